@@ -327,12 +327,15 @@ def _valid_qt_kwargs():
              'Validator': lambda value: isinstance(value, str) and value.lower() in ['csv',
                                                                                      'hdf',
                                                                                      'feather',
-                                                                                     'fth'],
+                                                                                     'fth',
+                                                                                     'parquet',
+                                                                                     'pqt'],
              'level':     4,
              'text':      '确定本地历史数据文件的存储格式：\n'
                           'csv - 历史数据文件以csv形式存储，速度较慢但可以用Excel打开\n'
                           'hdf - 历史数据文件以hd5形式存储，数据存储和读取速度较快\n'
-                          'feather/fth - 历史数据文件以feather格式存储，数据交换速度快但不适用长期存储'},
+                          'feather/fth - 历史数据文件以feather格式存储，数据交换速度快但不适用长期存储\n'
+                          'parquet/pqt - 历史数据文件以parquet列存储格式存储，读取速度快且占用空间小'},
 
         'local_data_file_path':
             {'Default':   'data/',
@@ -12,7 +12,7 @@
 # different trading platforms or brokers
 # ======================================
 
-from queue import Queue
+from queue import Queue, Empty
 from abc import abstractmethod, ABCMeta
 from threading import Thread
 
@@ -24,6 +24,8 @@ from .utilfuncs import get_current_tz_datetime
 
 CASH_DECIMAL_PLACES = QT_CONFIG['cash_decimal_places']
 AMOUNT_DECIMAL_PLACES = QT_CONFIG['amount_decimal_places']
+# Broker主循环每次等待交易订单的最长时间（秒），超时后检查Broker的状态
+ORDER_WAIT_TIMEOUT = 0.05
 
 
 def _verify_trade_result(trade_result, order_qty):
@@ -153,7 +155,6 @@ class Broker(object):
         self.status = 'init'
         while True:
             try:
-                time.sleep(0.05)
                 if self.status == 'stopped':
                     # 如果Broker正常退出，处理尚未提取的交易订单，这些订单将不会被处理，会提示用户取消订单
                     print(f'Stopping un-processed orders in broker...')
@@ -172,14 +173,16 @@ class Broker(object):
 
                 # 如果Broker处于暂停状态，则不处理交易订单
                 if self.status == 'paused':
+                    time.sleep(ORDER_WAIT_TIMEOUT)
                     continue
 
-                # 如果order_queue为空，则不处理交易订单
-                if self.order_queue.empty():
+                # 阻塞等待交易订单，订单到达时立即提取，如果超时仍没有订单，则重新检查Broker的状态
+                try:
+                    order = self.order_queue.get(timeout=ORDER_WAIT_TIMEOUT)  # order is a dict
+                except Empty:
                     continue
 
-                # order_queue不为空，提取交易订单，在一个单独的thread中调用self._get_result()处理交易订单
-                order = self.order_queue.get()  # order is a dict, should be packed in a tuple
+                # 提取交易订单后，在一个单独的thread中调用self._get_result()处理交易订单
                 t = Thread(target=self._get_result, args=(order, ), daemon=True)
                 t.start()
 
@@ -12,15 +12,15 @@ from os import path
 import pandas as pd
 import warnings
 
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from functools import lru_cache
 
 from .utilfuncs import progress_bar, sec_to_duration, nearest_market_trade_day, input_to_list
-from .utilfuncs import is_market_trade_day, str_to_list, regulate_date_format
+from .utilfuncs import market_trade_day_mask, str_to_list, regulate_date_format
 from .utilfuncs import _wildcard_match, _partial_lev_ratio, _lev_ratio, human_file_size, human_units
 from .utilfuncs import freq_dither
 
-AVAILABLE_DATA_FILE_TYPES = ['csv', 'hdf', 'hdf5', 'feather', 'fth']
+AVAILABLE_DATA_FILE_TYPES = ['csv', 'hdf', 'hdf5', 'feather', 'fth', 'parquet', 'pqt']
 AVAILABLE_CHANNELS = ['df', 'csv', 'excel', 'tushare']
 ADJUSTABLE_PRICE_TYPES = ['open', 'high', 'low', 'close']
 TABLE_USAGES = ['sys', 'cal', 'basics', 'data', 'adj', 'events', 'comp', 'report', 'mins']
@@ -2379,7 +2379,7 @@ class DataSource:
     对象会检查数据的格式，确保格式正确并删除重复的数据。
     下载下来的历史数据可以存储成不同的格式，但是不管任何存储格式，所有数据表的结构都是一样
     的，而且都是与Pandas的DataFrame兼容的数据表格式。目前兼容的文件存储格式包括csv, hdf,
-    fth(feather)，兼容的数据库包括mysql和MariaDB。
+    fth(feather), parquet，兼容的数据库包括mysql和MariaDB。
     如果HistoryPanel所要求的数据未存放在本地，DataSource对象不会主动下载缺失的数据，仅会
     返回空DataFrame。
     DataSource对象可以按要求定期刷新或从Provider拉取数据，也可以手动操作
@@ -2425,11 +2425,12 @@ class DataSource:
             数据源类型:
             - db/database: 数据存储在mysql数据库中
             - file: 数据存储在本地文件中
-        file_type: str, {'csv', 'hdf', 'hdf5', 'feather', 'fth'}, Default: csv
+        file_type: str, {'csv', 'hdf', 'hdf5', 'feather', 'fth', 'parquet', 'pqt'}, Default: csv
             如果数据源为file时，数据文件类型：
             - csv: 简单的纯文本文件格式，可以用Excel打开，但是占用空间大，读取速度慢
             - hdf/hdf5: 基于pytables的数据表文件，速度较快，需要安装pytables
             - feather/fth: 轻量级数据文件，速度较快，占用空间小，需要安装pyarrow
+            - parquet/pqt: 压缩的列存储数据文件，读取速度快，占用空间小，需要安装pyarrow
         file_loc: str, Default: data/
             用于存储本地数据文件的路径
         host: str, default: localhost
@@ -2459,6 +2460,8 @@ class DataSource:
         if source_type.lower() not in ['file', 'database', 'db']:
             raise ValueError(f'invalid source_type')
         self._table_list = set()
+        self._file_metadata = {}  # 缓存数据文件的元数据，以文件名为键，值为((修改时间, 文件大小), 元数据字典)
+        self._file_path_names = {}  # 缓存数据文件的完整路径名，以文件名为键
 
         if source_type.lower() in ['db', 'database']:
             # optional packages to be imported
@@ -2512,8 +2515,8 @@ class DataSource:
                 raise TypeError(f'file type should be a string, got {type(file_type)} instead!')
             file_type = file_type.lower()
             if file_type not in AVAILABLE_DATA_FILE_TYPES:
-                raise KeyError(f'file type not recognized, supported file types are csv / hdf / feather')
-            if file_type in ['hdf']:
+                raise KeyError(f'file type not recognized, supported file types are csv / hdf / feather / parquet')
+            if file_type in ['hdf', 'hdf5']:
                 try:
                     import tables
                 except ImportError:
@@ -2527,6 +2530,13 @@ class DataSource:
                     raise ImportError(f'Missing optional dependency \'pyarrow\' for datasource file type '
                                       f'\'feather\'. Use pip or conda to install pyarrow')
                 file_type = 'fth'
+            if file_type in ['parquet', 'pqt']:
+                try:
+                    import pyarrow
+                except ImportError:
+                    raise ImportError(f'Missing optional dependency \'pyarrow\' for datasource file type '
+                                      f'\'parquet\'. Use pip or conda to install pyarrow')
+                file_type = 'parquet'
             from qteasy import QT_ROOT_PATH
             self.file_path = path.join(QT_ROOT_PATH, file_loc)
             try:
@@ -2636,8 +2646,10 @@ class DataSource:
             raise RuntimeError('can not check file system while source type is "db"')
         if not isinstance(file_name, str):
             raise TypeError(f'file_name name must be a string, {file_name} is not a valid input!')
-        file_name = file_name + '.' + self.file_type
-        file_path_name = path.join(self.file_path, file_name)
+        file_path_name = self._file_path_names.get(file_name)
+        if file_path_name is None:
+            file_path_name = path.join(self.file_path, f'{file_name}.{self.file_type}')
+            self._file_path_names[file_name] = file_path_name
         return file_path_name
 
     def file_exists(self, file_name):
@@ -2670,14 +2682,83 @@ class DataSource:
         elif self.file_type == 'fth':
             df.reset_index().to_feather(file_path_name)
         elif self.file_type == 'hdf':
-            df.to_hdf(file_path_name, key='df')
+            # 以table格式写入hdf文件，以便读取时可以按列和按条件筛选数据，如果数据中包含无法以table
+            # 格式存储的混合类型数据，则退回fixed格式
+            try:
+                df.to_hdf(file_path_name, key='df', mode='w', format='table', complib='blosc', complevel=5)
+            except (TypeError, ValueError):
+                df.to_hdf(file_path_name, key='df', mode='w', format='fixed', complib='blosc', complevel=5)
+        elif self.file_type == 'parquet':
+            # 按较小的row group写入parquet文件，读取时可以利用每个row group的统计信息跳过不符合筛选条件的数据
+            df.to_parquet(file_path_name, compression='snappy', row_group_size=100000)
         else:  # for some unexpected cases
             raise TypeError(f'Invalid file type: {self.file_type}')
         return len(df)
 
+    def append_file(self, df, file_name, append_key):
+        """ 将df中的数据追加写入到本地文件的末尾，不需要读取和重写整个文件
+
+        仅当df中append_key的所有值都大于文件中已有数据的最大值，即新数据与已有数据没有重叠时，
+        才会追加写入，仅csv文件和table格式的hdf文件支持追加写入
+
+        Parameters
+        ----------
+        df: pd.DataFrame
+            待写入文件的DataFrame，行标签已经设置为数据表的主键
+        file_name: str
+            本地文件名(不含扩展名)
+        append_key: str
+            用于判断新数据是否全部晚于已有数据的主键名，通常是日期型主键
+
+        Returns
+        -------
+        int: 追加写入文件的数据行数
+            如果文件不存在、文件类型不支持追加写入，或新数据与已有数据有重叠时，不写入数据并返回None
+        """
+        if (self.file_type not in ['csv', 'hdf']) or (not self.file_exists(file_name)) or df.empty:
+            return None
+        file_path_name = self.get_file_path_name(file_name)
+        new_keys = df.index.get_level_values(append_key)
+
+        if self.file_type == 'csv':
+            # 只有当文件中数据列的顺序与df完全相同时才能追加写入
+            with open(file_path_name, 'r') as fp:
+                header = fp.readline().strip().split(',')
+            if header != list(df.index.names) + list(df.columns):
+                return None
+            existing_keys = pd.read_csv(file_path_name, usecols=[append_key], engine='c')[append_key]
+            if isinstance(new_keys, pd.DatetimeIndex):
+                existing_keys = pd.to_datetime(existing_keys)
+            try:
+                if existing_keys.empty or not (new_keys.min() > existing_keys.max()):
+                    return None
+            except TypeError:
+                return None
+            df.to_csv(file_path_name, mode='a', header=False)
+            return len(df)
+
+        with pd.HDFStore(file_path_name, mode='a') as store:
+            storer = store.get_storer('df')
+            if (storer is None) or (not storer.is_table):
+                return None
+            existing_keys = store.select_column('df', 'index' if storer.levels == 1 else append_key)
+            try:
+                if existing_keys.empty or not (new_keys.min() > existing_keys.max()):
+                    return None
+            except TypeError:
+                return None
+            try:
+                store.append('df', df, complib='blosc', complevel=5)
+            except (TypeError, ValueError):
+                # 新数据的列或数据类型与文件中已有数据不一致时，无法追加写入
+                return None
+        return len(df)
+
     def read_file(self, file_name, primary_key, pk_dtypes, share_like_pk=None,
-                  shares=None, date_like_pk=None, start=None, end=None, chunk_size=50000):
-        """ 从文件中读取DataFrame，当文件类型为csv时，支持分块读取且完成数据筛选
+                  shares=None, date_like_pk=None, start=None, end=None, chunk_size=50000, columns=None):
+        """ 从文件中读取DataFrame，当文件类型为csv时，支持分块读取且完成数据筛选，当文件类型
+        为hdf(table格式)或parquet时，筛选条件和需要读取的列会直接传递给文件读取函数，仅读取
+        需要的数据
 
         Parameters
         ----------
@@ -2699,6 +2780,8 @@ class DataSource:
             用于按日期筛选数据的结束日期
         chunk_size: int
             分块读取csv大文件时的分块大小
+        columns: list of str, optional
+            需要读取的非主键列，默认为None，读取所有列，对feather文件无效
 
         Returns
         -------
@@ -2709,7 +2792,7 @@ class DataSource:
         #  也就是说，在read_table_data级别筛选数据还是在read_file/read_database级别
         #  筛选数据？
         file_path_name = self.get_file_path_name(file_name)
-        if not self.file_exists(file_name):
+        if not path.exists(file_path_name):
             # 如果文件不存在，则返回空的DataFrame
             return pd.DataFrame()
         if date_like_pk is not None:
@@ -2718,7 +2801,19 @@ class DataSource:
 
         if self.file_type == 'csv':
             # 这里针对csv文件进行了优化，通过分块读取文件，避免当文件过大时导致读取异常
-            df_reader = pd.read_csv(file_path_name, chunksize=chunk_size)  # TODO: add try to escape file reading errors
+            # 仅解析需要的列，且主键中的证券代码和日期直接按字符串读取，避免类型推断
+            usecols = None
+            if columns is not None:
+                cols_to_read = set(primary_key) | set(columns)
+                usecols = lambda col: col in cols_to_read
+            str_dtypes = {col: str for col, dtype in zip(primary_key, pk_dtypes)
+                          if (col == date_like_pk) or dtype.lower().startswith('varchar')}
+            df_reader = pd.read_csv(file_path_name,
+                                    chunksize=chunk_size,
+                                    usecols=usecols,
+                                    dtype=str_dtypes if str_dtypes else None,
+                                    engine='c',
+                                    memory_map=True)  # TODO: add try to escape file reading errors
             df_picker = (chunk for chunk in df_reader)
             if (share_like_pk is not None) and (date_like_pk is not None):
                 df_picker = (chunk.loc[(chunk[share_like_pk].isin(shares)) &
@@ -2735,12 +2830,57 @@ class DataSource:
             return df
 
         if self.file_type == 'hdf':
-            # TODO: hdf5/feather的大文件读取尚未优化
-            df = pd.read_hdf(file_path_name, 'df')  # TODO: add try to escape file reading errors
+            with pd.HDFStore(file_path_name, mode='r') as store:
+                storer = store.get_storer('df')
+                queryables = storer.queryables() if storer.is_table else {}
+                if storer.is_table and (storer.levels == 1) and (len(primary_key) == 1):
+                    # 单层index的hdf table中，主键只能以"index"的名称查询
+                    queryables = {**queryables, primary_key[0]: 'index'}
+                filter_cols = [col for col in (share_like_pk, date_like_pk) if col is not None]
+                if storer.is_table and all(col in queryables for col in filter_cols):
+                    # table格式的hdf文件可以在读取时直接筛选数据，只读取需要的行和列
+                    where = []
+                    if share_like_pk is not None:
+                        where.append(f'{_hdf_query_name(share_like_pk, queryables)} in {list(shares)}')
+                    if date_like_pk is not None:
+                        where.append(f'{_hdf_query_name(date_like_pk, queryables)} >= "{start}"')
+                        where.append(f'{_hdf_query_name(date_like_pk, queryables)} <= "{end}"')
+                    df = store.select('df', where=where if where else None, columns=columns)
+                    if list(df.index.names) != primary_key:
+                        df = set_primary_key_frame(df, primary_key=primary_key, pk_dtypes=pk_dtypes)
+                        set_primary_key_index(df, primary_key=primary_key, pk_dtypes=pk_dtypes)
+                    return df
+                # fixed格式的hdf文件或者筛选条件不在主键中时，只能读取全部数据后再筛选
+                df = store.select('df')
             df = set_primary_key_frame(df, primary_key=primary_key, pk_dtypes=pk_dtypes)
         elif self.file_type == 'fth':
-            # TODO: feather大文件读取尚未优化
-            df = pd.read_feather(file_path_name)  # TODO: add try to escape file reading errors
+            # feather文件按列存储，读取时只读取主键和需要的数据列，列的顺序与文件中保持一致
+            cols_to_read = None
+            if columns is not None:
+                import pyarrow.dataset as pads
+                file_columns = pads.dataset(file_path_name, format='feather').schema.names
+                cols_to_read = [col for col in file_columns if (col in primary_key) or (col in columns)]
+            df = pd.read_feather(file_path_name, columns=cols_to_read)  # TODO: add try to escape file reading errors
+        elif self.file_type == 'parquet':
+            # parquet文件在读取时直接筛选数据，只读取需要的行和列
+            filters = []
+            if share_like_pk is not None:
+                filters.append((share_like_pk, 'in', list(shares)))
+            if date_like_pk is not None:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                date_field_type = pq.read_schema(file_path_name).field(date_like_pk).type
+                if pa.types.is_timestamp(date_field_type):
+                    filters.append((date_like_pk, '>=', pd.Timestamp(start)))
+                    filters.append((date_like_pk, '<=', pd.Timestamp(end)))
+                else:
+                    filters.append((date_like_pk, '>=', start))
+                    filters.append((date_like_pk, '<=', end))
+            df = pd.read_parquet(file_path_name, columns=columns, filters=filters if filters else None)
+            if list(df.index.names) != primary_key:
+                df = set_primary_key_frame(df, primary_key=primary_key, pk_dtypes=pk_dtypes)
+                set_primary_key_index(df, primary_key=primary_key, pk_dtypes=pk_dtypes)
+            return df
         else:  # for some unexpected cases
             raise TypeError(f'Invalid file type: {self.file_type}')
 
@@ -2817,10 +2957,10 @@ class DataSource:
         -------
         None
         """
-        import os
-        if self.file_exists(file_name):
-            file_path_name = os.path.join(self.file_path, file_name + '.' + self.file_type)
-            os.remove(file_path_name)
+        try:
+            os.remove(self.get_file_path_name(file_name))
+        except FileNotFoundError:
+            pass
 
     def get_file_size(self, file_name):
         """ 获取文件大小，输出
@@ -2842,21 +2982,137 @@ class DataSource:
         except Exception as e:
             raise RuntimeError(f'{e}, unknown error encountered.')
 
-    def get_file_rows(self, file_name):
-        """获取csv、hdf、fether文件中数据的行数"""
+    def get_file_metadata(self, file_name):
+        """ 获取数据文件的元数据（行数），元数据在文件未被修改时缓存在DataSource中，
+        hdf(table格式)、feather和parquet文件的行数直接从文件的元数据中读取，无需读取全部数据
+
+        Parameters
+        ----------
+        file_name: str
+            文件名(不含扩展名)
+
+        Returns
+        -------
+        dict: {'rows': int}
+            文件不存在时返回None
+        """
         file_path_name = self.get_file_path_name(file_name)
+        try:
+            file_stat = os.stat(file_path_name)
+        except FileNotFoundError:
+            self._file_metadata.pop(file_name, None)
+            return None
+        file_version = (file_stat.st_mtime_ns, file_stat.st_size)
+        cached = self._file_metadata.get(file_name)
+        if (cached is not None) and (cached[0] == file_version):
+            return cached[1]
+
         if self.file_type == 'csv':
             with open(file_path_name, 'r') as fp:
-                line_count = None
-                for line_count, line in enumerate(fp):
+                fp.readline()
+                line_count = 0
+                for line_count, line in enumerate(fp, 1):
                     pass
-                return line_count
+            metadata = {'rows': line_count}
         elif self.file_type == 'hdf':
-            df = pd.read_hdf(file_path_name, 'df')
-            return len(df)
+            with pd.HDFStore(file_path_name, mode='r') as store:
+                storer = store.get_storer('df')
+                if storer.is_table:
+                    metadata = {'rows': storer.nrows}
+                else:
+                    metadata = {'rows': len(store.select('df'))}
         elif self.file_type == 'fth':
-            df = pd.read_feather(file_path_name)
-            return len(df)
+            # 通过pyarrow dataset统计行数时只读取各个record batch的元数据，不需要读取和解压数据
+            import pyarrow.dataset as pads
+            metadata = {'rows': pads.dataset(file_path_name, format='feather').count_rows()}
+        elif self.file_type == 'parquet':
+            import pyarrow.parquet as pq
+            metadata = {'rows': pq.ParquetFile(file_path_name).metadata.num_rows}
+        else:  # for some unexpected cases
+            raise TypeError(f'Invalid file type: {self.file_type}')
+
+        self._file_metadata[file_name] = (file_version, metadata)
+        return metadata
+
+    def get_file_rows(self, file_name):
+        """获取csv、hdf、feather、parquet文件中数据的行数"""
+        metadata = self.get_file_metadata(file_name)
+        if metadata is None:
+            raise FileNotFoundError(f'File {self.get_file_path_name(file_name)} not found!')
+        return metadata['rows']
+
+    def convert_csv_to_hdf(self, file_name, chunksize=200000):
+        """ 将数据文件夹中的csv文件分块转换为同名的table格式hdf文件，每次只读取chunksize行数据
+        并追加写入hdf文件，转换过程中占用的内存与文件大小无关，适合迁移较大的csv数据文件
+
+        如果file_name是内置数据表的名称，按照数据表的结构读取数据并设置主键，字符串和日期列按字符串
+        存储，写入数据前会先分块扫描一遍这些列，按最大长度确定hdf文件中的列宽；否则以csv文件的
+        第一列作为行标签
+
+        Parameters
+        ----------
+        file_name: str
+            文件名(不含扩展名)
+        chunksize: int, default 200000
+            每次读取和写入的数据行数
+
+        Returns
+        -------
+        int: 写入hdf文件的数据行数
+        """
+        if self.source_type == 'db':
+            raise RuntimeError('can not convert files while source type is "db"')
+        if not isinstance(file_name, str):
+            raise TypeError(f'file_name name must be a string, {file_name} is not a valid input!')
+        if not isinstance(chunksize, int):
+            raise TypeError(f'chunksize should be an integer, got {type(chunksize)} instead')
+        if chunksize <= 0:
+            raise ValueError(f'chunksize should be larger than 0, got {chunksize} instead')
+        csv_file_path_name = path.join(self.file_path, f'{file_name}.csv')
+        hdf_file_path_name = path.join(self.file_path, f'{file_name}.hdf')
+        if not path.exists(csv_file_path_name):
+            raise FileNotFoundError(f'File {csv_file_path_name} not found!')
+
+        primary_key = pk_dtypes = None
+        str_dtypes = {}
+        min_itemsize = {}
+        if file_name in TABLE_MASTERS:
+            columns, dtypes, primary_key, pk_dtypes = get_built_in_table_schema(file_name)
+            csv_columns = pd.read_csv(csv_file_path_name, nrows=0).columns
+            # 字符串和日期列按字符串读取，避免不同数据块推断出不同的数据类型导致无法追加写入
+            str_dtypes = {col: str for col, dtype in zip(columns, dtypes)
+                          if (col in csv_columns) and
+                          (dtype.lower().startswith(('varchar', 'text')) or
+                           ((col not in primary_key) and ('date' in dtype.lower())))}
+            # hdf table中字符串列的宽度由第一次写入的数据块确定，因此先逐块扫描一遍所有字符串列，
+            # 按照最大长度预留存储空间，以容纳后续数据块中更长的字符串，空值在hdf文件中存储为"nan"，
+            # 因此至少预留3个字符
+            str_lengths = dict.fromkeys(str_dtypes, 3)
+            if str_dtypes:
+                for chunk in pd.read_csv(csv_file_path_name, usecols=list(str_dtypes), dtype=str, chunksize=chunksize):
+                    for col, length in chunk.apply(lambda ser: ser.str.len().max()).items():
+                        if length > str_lengths[col]:
+                            str_lengths[col] = int(length)
+            for col, length in str_lengths.items():
+                min_itemsize['index' if primary_key == [col] else col] = length
+
+        if primary_key is None:
+            df_reader = pd.read_csv(csv_file_path_name, index_col=0, parse_dates=True, chunksize=chunksize)
+        else:
+            df_reader = pd.read_csv(csv_file_path_name, dtype=str_dtypes if str_dtypes else None, chunksize=chunksize)
+
+        rows = 0
+        with pd.HDFStore(hdf_file_path_name, mode='w', complib='blosc', complevel=5) as store:
+            for chunk in df_reader:
+                if chunk.empty:
+                    continue
+                if primary_key is not None:
+                    set_primary_key_index(chunk, primary_key=primary_key, pk_dtypes=pk_dtypes)
+                store.append('df', chunk, format='table',
+                             min_itemsize={k: v for k, v in min_itemsize.items()
+                                           if (k == 'index') or (k in chunk.columns) or (k in chunk.index.names)})
+                rows += len(chunk)
+        return rows
 
     # 数据库操作层函数，只操作具体的数据表，不操作数据
     def read_database(self, db_table, share_like_pk=None, shares=None, date_like_pk=None, start=None, end=None):
@@ -3355,10 +3611,10 @@ class DataSource:
         else:
             raise KeyError(f'invalid source_type: {self.source_type}')
 
-    def read_table_data(self, table, shares=None, start=None, end=None):
+    def read_table_data(self, table, shares=None, start=None, end=None, columns=None):
         """ 从本地数据表中读取数据并返回DataFrame，不修改数据格式
 
-        在读取数据表时读取所有的列，但是返回值筛选ts_code以及trade_date between start 和 end
+        在读取数据表时默认读取所有的列，但是返回值筛选ts_code以及trade_date between start 和 end
 
         Parameters
         ----------
@@ -3370,6 +3626,8 @@ class DataSource:
             YYYYMMDD格式日期，为空时不筛选
         end: str，
             YYYYMMDD格式日期，当start不为空时有效，筛选日期范围
+        columns: list of str, optional
+            需要读取的数据列(不含主键)，为空时读取所有列
 
         Returns
         -------
@@ -3396,7 +3654,7 @@ class DataSource:
             end = regulate_date_format(end)
             assert pd.to_datetime(start) <= pd.to_datetime(end)
 
-        columns, dtypes, primary_key, pk_dtypes = get_built_in_table_schema(table)
+        table_columns, dtypes, primary_key, pk_dtypes = get_built_in_table_schema(table)
         # 识别primary key中的证券代码列名和日期类型列名，确认是否需要筛选证券代码及日期
         share_like_pk = None
         date_like_pk = None
@@ -3426,7 +3684,8 @@ class DataSource:
                                 shares=shares,
                                 date_like_pk=date_like_pk,
                                 start=start,
-                                end=end)
+                                end=end,
+                                columns=columns)
             if df.empty:
                 return df
             if share_like_pk is not None:
@@ -3444,7 +3703,7 @@ class DataSource:
             # 需要手动设置index，但是读取的数据已经按shares/start/end筛选，无需手动筛选
             if not self.db_table_exists(db_table=table):
                 # 如果数据库中不存在该表，则创建表
-                self.new_db_table(db_table=table, columns=columns, dtypes=dtypes, primary_key=primary_key)
+                self.new_db_table(db_table=table, columns=table_columns, dtypes=dtypes, primary_key=primary_key)
             if share_like_pk is None:
                 shares = None
             if date_like_pk is None:
@@ -3462,6 +3721,8 @@ class DataSource:
         else:  # for unexpected cases:
             raise TypeError(f'Invalid value DataSource.source_type: {self.source_type}')
 
+        if columns is not None:
+            df = df.reindex(columns=[col for col in df.columns if col in columns])
         return df
 
     def export_table_data(self, table, file_name=None, file_path=None, shares=None, start=None, end=None):
@@ -3726,7 +3987,8 @@ class DataSource:
             current_time = pd.to_datetime('today')
             # begin time is freq minutes before current time
             begin_time = current_time.strftime('%Y%m%d')
-            for symbol in symbols:
+
+            def acquire_symbol_data(symbol):
                 code = symbol.split('.')[0]
                 dnld_data = acquire_data_from_em(
                         api_name='get_k_history',
@@ -3738,9 +4000,13 @@ class DataSource:
                 # 仅保留dnld_data的最后一行，并添加ts_code列，值为symbol
                 dnld_data = dnld_data.iloc[-1:, :]
                 dnld_data['ts_code'] = symbol
-                # 将dnld_data合并到result_data的最后一行 # TODO: 检查是否需要ignore_index参数？此时index信息会丢失
+                return dnld_data
 
-                result_data = pd.concat([result_data, dnld_data], axis=0, ignore_index=True)
+            # 各个symbol的数据下载相互独立，使用多线程同时下载，并按照symbols的顺序合并结果
+            with ThreadPoolExecutor(max_workers=10) as executor:
+                symbol_data = list(executor.map(acquire_symbol_data, symbols))
+            # TODO: 检查是否需要ignore_index参数？此时index信息会丢失
+            result_data = pd.concat([result_data] + symbol_data, axis=0, ignore_index=True)
 
             return result_data
         else:
@@ -3786,7 +4052,7 @@ class DataSource:
         dnld_columns = dnld_data.columns.to_list()
         # 如果table中的相当部分(25%)不能从df中找到，判断df与table完全不匹配，报错
         # 否则判断df基本与table匹配，根据Constraints，添加缺少的列(通常为NULL列)
-        missing_columns = [col for col in table_columns if col not in dnld_columns]
+        missing_columns = pd.Index(table_columns).difference(dnld_columns, sort=False)
         if len(missing_columns) >= (len(table_columns) * 0.25):
             raise ValueError(f'there are too many missing columns in downloaded df, can not merge to local table:'
                              f'table_columns:\n{[table_columns]}\n'
@@ -3794,7 +4060,7 @@ class DataSource:
         else:
             pass  # 在后面调整列顺序时会同时添加缺的列并调整顺序
         # 删除数据中过多的列，不允许出现缺少列
-        columns_to_drop = [col for col in dnld_columns if col not in table_columns]
+        columns_to_drop = dnld_data.columns.difference(table_columns, sort=False)
         if len(columns_to_drop) > 0:
             dnld_data.drop(columns=columns_to_drop, inplace=True)
         # 确保df与table的column顺序一致
@@ -3804,8 +4070,20 @@ class DataSource:
             # 如果source_type == 'file'，需要将下载的数据与本地数据合并，本地数据必须全部下载，
             # 数据量大后非常费时
             # 因此本地文件系统承载的数据量非常有限
-            local_data = self.read_table_data(table)
             set_primary_key_index(dnld_data, primary_key=primary_keys, pk_dtypes=pk_dtypes)
+            # 如果下载的数据全部晚于本地数据，两者没有重叠，不论merge_type如何，都只需要将下载的数据追加
+            # 到本地文件的末尾，不需要读取和重写整个文件
+            date_like_pks = [pk for pk, pk_dtype in zip(primary_keys, pk_dtypes) if pk_dtype in ['date', 'datetime']]
+            if date_like_pks:
+                append_key = date_like_pks[0]
+            else:
+                append_key = primary_keys[0] if len(primary_keys) == 1 else None
+            if append_key is not None:
+                rows_affected = self.append_file(dnld_data, file_name=table, append_key=append_key)
+                if rows_affected is not None:
+                    self._table_list.add(table)
+                    return rows_affected
+            local_data = self.read_table_data(table)
             # 根据merge_type处理重叠部分：
             if merge_type == 'ignore':
                 # 丢弃下载数据中的重叠部分
@@ -3814,7 +4092,10 @@ class DataSource:
                 local_data = local_data[~local_data.index.isin(dnld_data.index)]
             else:  # for unexpected cases
                 raise KeyError(f'Invalid merge type, got "{merge_type}"')
-            rows_affected = self.write_table_data(pd.concat([local_data, dnld_data]), table=table)
+            # 本地数据和下载数据都已经按主键设置好行标签及日期格式，合并后直接写入文件，无需再次设置主键
+            merged_data = dnld_data if local_data.empty else pd.concat([local_data, dnld_data])
+            rows_affected = self.write_file(merged_data, file_name=table)
+            self._table_list.add(table)
         elif self.source_type == 'db':
             # 如果source_type == 'db'，不需要合并数据，当merge_type == 'update'时，甚至不需要下载
             # 本地数据
@@ -4064,13 +4345,12 @@ class DataSource:
         """
 
         ensure_sys_table(table)
-        # 如果是文件系统，在可行的情况下，直接从文件系统中获取最后一个id，否则读取文件数据后获取id
+        # 如果是文件系统，只读取文件中的主键(id)列，从中获取最后一个id
         if self.source_type == 'file':
-            df = self.read_sys_table_data(table)
-            if df is None:
+            columns, dtypes, p_keys, pk_dtypes = get_built_in_table_schema(table)
+            df = self.read_file(table, p_keys, pk_dtypes, columns=[])
+            if len(df.index) == 0:
                 return 0
-            # if df.empty:
-            #     return 0
             return df.index.max()
         # 如果是数据库系统，直接获取最后一个id
         elif self.source_type == 'db':
@@ -4123,24 +4403,32 @@ class DataSource:
         ----------
         table: str
             需要读取的数据表名称
-        record_id: int, Default: None
-            如果给出id，只返回id行记录
+        record_id: int or list of int, Default: None
+            如果给出id，只返回id行记录，如果给出id的列表，返回所有这些id的记录
         kwargs: dict
             筛选数据的条件，包括用作筛选条件的字典如: account_id = 123
+            筛选条件的值也可以是list或tuple，此时选出字段值在其中的所有记录，如: status = ['submitted', 'filled']
 
         Returns
         -------
         data: dict
             当给出record_id时，读取的数据为dict，包括数据表的结构化信息以及数据表中的记录
         pd.DataFrame:
-            当不给出record_id时，读取的数据为DataFrame，包括数据表的结构化信息以及数据表中的记录
+            当不给出record_id或给出record_id的列表时，读取的数据为DataFrame，包括数据表的结构化信息以及数据表中的记录
         None:
             当输入的id或筛选条件没有匹配项时
         """
 
-        # 检查record_id是否合法
-        if record_id is not None and record_id <= 0:
-            return None
+        # 检查record_id是否合法，给出id列表时一次读取所有的记录
+        single_record = not isinstance(record_id, (list, tuple))
+        if single_record:
+            if record_id is not None and record_id <= 0:
+                return None
+            id_values = [record_id] if record_id else None
+        else:
+            id_values = [i for i in record_id if i > 0]
+            if not id_values:
+                return None
 
         ensure_sys_table(table)
 
@@ -4150,7 +4438,6 @@ class DataSource:
             raise KeyError(f'kwargs not valid: {[k for k in kwargs if k not in columns]}')
 
         id_column = p_keys[0] if (len(p_keys) == 1) and (record_id is not None) else None
-        id_values = [record_id] if record_id else None
 
         # 读取数据，如果给出id，则只读取一条数据，否则读取所有数据
         if self.source_type == 'db':
@@ -4168,9 +4455,12 @@ class DataSource:
 
         # 筛选数据
         for k, v in kwargs.items():
-            res_df = res_df.loc[res_df[k] == v]
+            if isinstance(v, (list, tuple)):
+                res_df = res_df.loc[res_df[k].isin(v)]
+            else:
+                res_df = res_df.loc[res_df[k] == v]
 
-        if record_id is not None:
+        if (record_id is not None) and single_record:
             return res_df.loc[record_id].to_dict()
         else:
             return res_df if not res_df.empty else None
@@ -4220,17 +4510,32 @@ class DataSource:
         pass
         """
 
-        # 将data构造为一个df，然后调用self.update_table_data()
-        table_data = self.read_sys_table_data(table, record_id=record_id)
-        if table_data is None:
-            raise KeyError(f'record_id({record_id}) not found in table {table}')
-
         # 当data中有不可用的字段时，会抛出异常
         columns, dtypes, p_keys, pk_dtypes = get_built_in_table_schema(table)
         data_columns = [col for col in columns if col not in p_keys]
         if any(k not in data_columns for k in data.keys()):
             raise KeyError(f'kwargs not valid: {[k for k in data.keys() if k not in data_columns]}')
 
+        if self.source_type == 'file':
+            # 文件系统中更新数据需要读取并重写整个文件，因此直接在读取的完整数据表中更新记录后写回文件，
+            # 不需要先读取记录，再在self.update_table_data()中重复读取整个数据表
+            all_data = self.read_file(table, p_keys, pk_dtypes)
+            if all_data.empty or (record_id not in all_data.index):
+                raise KeyError(f'record_id({record_id}) not found in table {table}')
+            record = all_data.loc[record_id].to_dict()
+            record.update(data)
+            record = pd.DataFrame(record, index=[record_id]).reindex(columns=all_data.columns)
+            record.index.name = p_keys[0]
+            all_data = pd.concat([all_data.drop(index=record_id), record])
+            # 数据已经按主键设置好行标签，直接写入文件，无需再次设置主键
+            self.write_file(all_data, file_name=table)
+            return record_id
+
+        # 将data构造为一个df，然后调用self.update_table_data()
+        table_data = self.read_sys_table_data(table, record_id=record_id)
+        if table_data is None:
+            raise KeyError(f'record_id({record_id}) not found in table {table}')
+
         # 更新original_data
         table_data.update(data)
 
@@ -4239,6 +4544,67 @@ class DataSource:
         self.update_table_data(table, df_data, merge_type='update')
         return record_id
 
+    def update_sys_table_records(self, table, records):
+        """ 一次更新多条系统操作表的数据
+
+        与update_sys_table_data()相同，但一次更新多条记录，整个数据表只需要读写一次
+
+        Parameters
+        ----------
+        table: str
+            需要更新的数据表名称
+        records: dict
+            需要更新的数据，key为记录的id，value为需要更新的字段组成的dict，如: {1: {'status': 'submitted'}}
+
+        Returns
+        -------
+        record_ids: list of int
+            更新的记录ID
+
+        Raises
+        ------
+        KeyError: 当给出的id不存在时
+        KeyError: 当给出的字段不存在时
+        """
+
+        ensure_sys_table(table)
+        if len(records) == 0:
+            return []
+
+        columns, dtypes, p_keys, pk_dtypes = get_built_in_table_schema(table)
+        data_columns = [col for col in columns if col not in p_keys]
+        for data in records.values():
+            if any(k not in data_columns for k in data.keys()):
+                raise KeyError(f'kwargs not valid: {[k for k in data.keys() if k not in data_columns]}')
+        record_ids = list(records.keys())
+
+        # 读取所有需要更新的记录，文件系统中需要读取整个数据表，更新后写回文件
+        if self.source_type == 'file':
+            all_data = self.read_file(table, p_keys, pk_dtypes)
+        else:
+            all_data = self.read_sys_table_data(table, record_id=record_ids)
+            if all_data is None:
+                all_data = pd.DataFrame()
+        missing_ids = [record_id for record_id in record_ids if record_id not in all_data.index]
+        if missing_ids:
+            raise KeyError(f'record_id({missing_ids}) not found in table {table}')
+
+        updated = {}
+        for record_id, data in records.items():
+            record = all_data.loc[record_id].to_dict()
+            record.update(data)
+            updated[record_id] = record
+        updated = pd.DataFrame.from_dict(updated, orient='index').reindex(columns=all_data.columns)
+        updated.index.name = p_keys[0]
+
+        if self.source_type == 'file':
+            all_data = pd.concat([all_data.drop(index=record_ids), updated])
+            # 数据已经按主键设置好行标签，直接写入文件，无需再次设置主键
+            self.write_file(all_data, file_name=table)
+        else:
+            self.update_table_data(table, updated, merge_type='update')
+        return record_ids
+
     def insert_sys_table_data(self, table, **data):
         """ 插入系统操作表的数据
 
@@ -4332,6 +4698,50 @@ class DataSource:
         #  test_database和test_trading测试都能通过，后续完整测试
         return record_id
 
+    def insert_sys_table_records(self, table, records):
+        """ 一次插入多条系统操作表的数据
+
+        与insert_sys_table_data()相同，但一次写入多条记录，整个数据表只需要读写一次
+        记录的ID从数据表当前最后一个ID开始依次自动生成
+
+        Parameters
+        ----------
+        table: str
+            需要更新的数据表名称
+        records: list of dict
+            需要插入的数据，每条数据的key必须与数据库表的字段相同，否则会抛出异常
+
+        Returns
+        -------
+        record_ids: list of int
+            插入的记录ID，顺序与records一致
+
+        Raises
+        ------
+        KeyError: 当任意一条数据给出的字段不完整或者有不可用的字段时
+        """
+
+        ensure_sys_table(table)
+        if len(records) == 0:
+            return []
+
+        columns, dtypes, primary_keys, pk_dtypes = get_built_in_table_schema(table)
+        data_columns = [col for col in columns if col not in primary_keys]
+        for data in records:
+            if any(k not in data_columns for k in data.keys()) or any(k not in data.keys() for k in data_columns):
+                raise KeyError(f'Input data keys must be the same as the table data columns, '
+                               f'got {list(data.keys())} vs {data_columns}')
+        last_id = self.get_sys_table_last_id(table)
+        first_id = last_id + 1 if last_id is not None else 1
+        record_ids = list(range(first_id, first_id + len(records)))
+        df = pd.DataFrame(records, index=record_ids, columns=data_columns)
+        df = df.reindex(columns=columns)
+        df.index.name = primary_keys[0]
+
+        # 插入数据
+        self.update_table_data(table, df, merge_type='update')
+        return record_ids
+
     # ==============
     # 顶层函数，包括用于组合HistoryPanel的数据获取接口函数，以及自动或手动下载本地数据的操作函数
     # ==============
@@ -4411,56 +4821,59 @@ class DataSource:
                 asset_type=asset_type,
                 soft_freq=True
         )
-        table_data_acquired = {}
-        table_data_columns = {}
         if (start is not None) or (end is not None):
             # 如果指定了start或end，则忽略row_count参数, 但是如果row_count为None，则默认为-1, 读取所有数据
             row_count = 0 if row_count is not None else -1
-        # 逐个读取相关数据表，删除名称与数据类型不同的，保存到一个字典中，这个字典的健为表名，值为读取的DataFrame
-        for tbl, columns in tables_to_read.items():
-            df = self.read_table_data(tbl, shares=shares, start=start, end=end)
+
+        def read_table(tbl, columns):
+            # 读取一个数据表，删除名称与数据类型不同的列
+            df = self.read_table_data(tbl, shares=shares, start=start, end=end, columns=columns)
             if not df.empty:
-                cols_to_drop = [col for col in df.columns if col not in columns]
+                cols_to_drop = df.columns.difference(columns, sort=False)
                 df.drop(columns=cols_to_drop, inplace=True)
                 if row_count > 0:
                     # 读取每一个ts_code的最后row_count行数据
                     df = df.groupby('ts_code').tail(row_count)
-            table_data_acquired[tbl] = df
-            table_data_columns[tbl] = df.columns
-        # 从读取的数据表中提取数据，生成单个数据类型的dataframe，并把各个dataframe合并起来
-        # 在df_by_htypes中预先存储了多个空DataFrame，用于逐个合并相关的历史数据
-        df_by_htypes = {k: v for k, v in zip(htypes, [pd.DataFrame()] * len(htypes))}
-        for htyp in htypes:
-            for tbl in tables_to_read:
-                if htyp in table_data_columns[tbl]:
-                    df = table_data_acquired[tbl]
-                    # 从本地读取的DF中的数据是按multi_index的形式stack起来的，因此需要unstack，成为多列、单index的数据
-                    if not df.empty:
-                        htyp_series = df[htyp]
-                        new_df = htyp_series.unstack(level=0)
-                        old_df = df_by_htypes[htyp]
-                        # 使用两种方法实现df的合并，分别是merge()和join()
-                        # df_by_htypes[htyp] = old_df.merge(new_df,
-                        #                                   how='outer',
-                        #                                   left_index=True,
-                        #                                   right_index=True,
-                        #                                   suffixes=('', '_y'))
-                        df_by_htypes[htyp] = old_df.join(new_df,
-                                                         how='outer',
-                                                         rsuffix='_y')
-
-        # 如果在历史数据合并后发现列名称冲突，发出警告信息，并删除后添加的列
-        conflict_cols = ''
-        for htyp in htypes:
-            df_columns = df_by_htypes[htyp].columns.to_list()
-            col_with_suffix = [col for col in df_columns if col[-2:] == '_y']
-            if len(col_with_suffix) > 0:
-                df_by_htypes[htyp].drop(columns=col_with_suffix, inplace=True)
-                conflict_cols += f'd-type {htyp} conflicts in {list(set(col[:-2] for col in col_with_suffix))};\n'
-        if conflict_cols != '':
+            return df
+
+        # 读取相关数据表，保存到一个字典中，这个字典的健为表名，值为读取的DataFrame
+        # 各个数据表的读取相互独立，使用多线程同时读取，使文件或数据库的IO等待时间相互重叠，
+        # 但pytables不支持多线程同时读取，因此hdf文件仍然逐个读取
+        if (len(tables_to_read) > 1) and (self.file_type != 'hdf'):
+            with ThreadPoolExecutor(max_workers=len(tables_to_read)) as executor:
+                futures = {tbl: executor.submit(read_table, tbl, columns) for tbl, columns in tables_to_read.items()}
+            table_data_acquired = {tbl: future.result() for tbl, future in futures.items()}
+        else:
+            table_data_acquired = {tbl: read_table(tbl, columns) for tbl, columns in tables_to_read.items()}
+        # 从读取的数据表中提取数据，生成单个数据类型的dataframe
+        # 从本地读取的DF中的数据是按multi_index的形式stack起来的，将所有数据表分别unstack后一次性合并为
+        # 一张以(htype, share)为列的宽表，再从宽表中直接取出各个htype的数据
+        unstacked_dfs = [df.unstack(level=0) for df in table_data_acquired.values() if not df.empty]
+        combined_df = pd.concat(unstacked_dfs, axis=1).sort_index() if unstacked_dfs else pd.DataFrame()
+        combined_df.columns.names = [None] * combined_df.columns.nlevels
+
+        # 如果同一个htype的同一个share从多个数据表中读取，发出警告信息，并删除后添加的列
+        duplicated_cols = combined_df.columns.duplicated()
+        if duplicated_cols.any():
+            conflicts = {}
+            for htyp, share in combined_df.columns[duplicated_cols]:
+                conflicts.setdefault(htyp, set()).add(share)
+            combined_df = combined_df.loc[:, ~duplicated_cols]
+            conflict_cols = ''.join(f'd-type {htyp} conflicts in {list(conflicts[htyp])};\n'
+                                    for htyp in htypes if htyp in conflicts)
             warnings.warn(f'\nConflict data encountered, some types of data are loaded from multiple tables, '
                           f'conflicting data might be discarded:\n'
                           f'{conflict_cols}', DataConflictWarning)
+        htypes_found = set(combined_df.columns.get_level_values(0))
+        df_by_htypes = {htyp: combined_df[htyp] if htyp in htypes_found else pd.DataFrame() for htyp in htypes}
+        if len(unstacked_dfs) > 1:
+            # 多张数据表合并后日期取并集，每个htype只保留包含该htype的数据表中的日期
+            htype_index = {}
+            for df in unstacked_dfs:
+                for htyp in df.columns.unique(level=0):
+                    htype_index[htyp] = df.index if htyp not in htype_index else htype_index[htyp].union(df.index)
+            df_by_htypes = {htyp: df.reindex(index=htype_index[htyp]) if htyp in htype_index else df
+                            for htyp, df in df_by_htypes.items()}
         # 如果提取的数据全部为空DF，说明DataSource可能数据不足，报错并建议
         if all(df.empty for df in df_by_htypes.values()):
             raise RuntimeError(f'Empty data extracted from DataSource {self.connection_type} with parameters:\n'
@@ -4560,7 +4973,7 @@ class DataSource:
         if shares is not None:
             if isinstance(shares, str):
                 shares = str_to_list(shares)
-            columns_to_drop = [item for item in all_shares if item not in shares]
+            columns_to_drop = all_shares.difference(shares, sort=False)
         for idx in index:
             if idx in indices_found:
                 weight_df = weight_data.loc[idx]
@@ -4791,7 +5204,7 @@ class DataSource:
                         # 当生成的日期不连续时，或要求生成交易日序列时，需要找到最近的交易日
                         arg_coverage = map(nearest_market_trade_day, arg_coverage)
                     if freq == 'd':
-                        arg_coverage = (date for date in arg_coverage if is_market_trade_day(date))
+                        arg_coverage = arg_coverage[market_trade_day_mask(arg_coverage)]
                 arg_coverage = list(pd.to_datetime(list(arg_coverage)).strftime('%Y%m%d'))
             elif fill_type == 'list':
                 arg_coverage = str_to_list(cur_table_info.arg_rng)
@@ -4812,7 +5225,7 @@ class DataSource:
             if self.table_data_exists(table) and merge_type.lower() == 'ignore':
                 # 当数据已经存在，且合并模式为"忽略新数据"时，从计划下载的数据范围中剔除已经存在的部分
                 already_existed = self.get_table_data_coverage(table, arg_name)
-                arg_coverage = [arg for arg in arg_coverage if arg not in already_existed]
+                arg_coverage = pd.Index(arg_coverage).difference(already_existed, sort=False).to_list()
 
             # 生成所有的参数, 开始循环下载并更新数据
             if reversed_par_seq:
@@ -4849,7 +5262,7 @@ class DataSource:
                                 dnld_data = pd.concat([dnld_data, df])
                                 rows_affected = self.update_table_data(table, dnld_data)
                                 dnld_data = pd.DataFrame()
-                            total_written += rows_affected
+                                total_written += rows_affected
                             time_elapsed = time.time() - st
                             time_remain = sec_to_duration((total - completed) * time_elapsed / completed,
                                                           estimation=True, short_form=False)
@@ -4867,7 +5280,7 @@ class DataSource:
                             dnld_data = pd.concat([dnld_data, df])
                             rows_affected = self.update_table_data(table, dnld_data)
                             dnld_data = pd.DataFrame()
-                        total_written += rows_affected
+                            total_written += rows_affected
                         time_elapsed = time.time() - st
                         time_remain = sec_to_duration(
                                 (total - completed) * time_elapsed / completed,
@@ -4939,26 +5352,19 @@ class DataSource:
         ValueError
             如果任意一个数据表为空，则抛出ValueError
         """
-        df_s = self.read_table_data('stock_basic')
-        if df_s.empty and raise_error:
-            raise ValueError('stock_basic table is empty, please refill data source with '
-                             '"qt.refill_data_source(tables="stock_basic")"')
-        df_i = self.read_table_data('index_basic')
-        if df_i.empty and raise_error:
-            raise ValueError('index_basic table is empty, please refill data source with '
-                             '"qt.refill_data_source(tables="index_basic")"')
-        df_f = self.read_table_data('fund_basic')
-        if df_f.empty and raise_error:
-            raise ValueError('fund_basic table is empty, please refill data source with '
-                             '"qt.refill_data_source(tables="fund_basic")"')
-        df_ft = self.read_table_data('future_basic')
-        if df_ft.empty and raise_error:
-            raise ValueError('future_basic table is empty, please refill data source with '
-                             '"qt.refill_data_source(tables="future_basic")"')
-        df_o = self.read_table_data('opt_basic')
-        if df_o.empty and raise_error:
-            raise ValueError('opt_basic table is empty, please refill data source with '
-                             '"qt.refill_data_source(tables="opt_basic")"')
+        basic_tables = ['stock_basic', 'index_basic', 'fund_basic', 'future_basic', 'opt_basic']
+        # 各个basic数据表的读取相互独立，使用多线程同时读取，但pytables不支持多线程同时读取，hdf文件仍然逐个读取
+        if self.file_type != 'hdf':
+            with ThreadPoolExecutor(max_workers=len(basic_tables)) as executor:
+                futures = [executor.submit(self.read_table_data, table) for table in basic_tables]
+            basic_dfs = [future.result() for future in futures]
+        else:
+            basic_dfs = [self.read_table_data(table) for table in basic_tables]
+        for table, df in zip(basic_tables, basic_dfs):
+            if df.empty and raise_error:
+                raise ValueError(f'{table} table is empty, please refill data source with '
+                                 f'"qt.refill_data_source(tables="{table}")"')
+        df_s, df_i, df_f, df_ft, df_o = basic_dfs
         return df_s, df_i, df_f, df_ft, df_o
 
     def reconnect(self):
@@ -4992,6 +5398,12 @@ class DataSource:
 
 
 # 以下是通用dataframe操作函数
+def _hdf_query_name(column, queryables):
+    """ 返回hdf table中可以用于where查询条件的列名，单层index的主键在hdf table中以"index"查询 """
+    name = queryables[column]
+    return name if isinstance(name, str) else column
+
+
 def set_primary_key_index(df, primary_key, pk_dtypes):
     """ df是一个DataFrame，primary key是df的某一列或多列的列名，将primary key所指的
     列设置为df的行标签，设置正确的时间日期格式，并删除primary key列后返回新的df
@@ -5277,10 +5689,10 @@ def set_primary_key_frame(df, primary_key, pk_dtypes):
     pk_columns = primary_key
 
     if idx_columns != [None]:
-        # index中有值，需要将index中的值放入DataFrame中
-        index_frame = df.index.to_frame()
-        for col in idx_columns:
-            df[col] = index_frame[col]
+        # index中有值，需要将index中的值放入DataFrame中，使用reset_index一次性完成，不逐列插入
+        # 如果df中已有与index同名的列，以index中的值为准。与原来一样原地修改df，调用者持有的df同样被更新
+        df.drop(columns=[col for col in idx_columns if col in df.columns], inplace=True)
+        df.reset_index(inplace=True)
 
     df.index = range(len(df))
     # 此时primary key有可能被放到了columns的最后面，需要将primary key移动到columns的最前面：
@@ -17,7 +17,13 @@ import requests
 
 from concurrent.futures import as_completed, ThreadPoolExecutor
 
-from .utilfuncs import str_to_list
+from qteasy import logger_core
+from .utilfuncs import str_to_list, retry
+
+# 东方财富接口主要用于获取实时价格，对时效要求高，网络请求失败时只做少数几次快速重试
+data_download_retry_count = 3
+data_download_retry_delay = 0.5
+data_download_retry_backoff = 2.
 
 
 # eastmoney interface function, call this function to extract data
@@ -72,6 +78,14 @@ def gen_eastmoney_code(rawcode: str) -> str:
             return f'1.{rawcode}'
 
 
+@retry(exception_to_check=requests.exceptions.RequestException, mute=True,
+       tries=data_download_retry_count, delay=data_download_retry_delay,
+       backoff=data_download_retry_backoff, logger=logger_core)
+def _get_json_response(url, headers):
+    """ 向东方财富接口发送请求并解析返回的json数据，遇到网络错误时自动重试"""
+    return requests.get(url, headers=headers).json()
+
+
 def get_k_history(code: str, beg: str = '16000101', end: str = '20500101', klt: int = 1, fqt: int = 1, verbose=False) -> pd.DataFrame:
     """ 功能获取k线数据
 
@@ -146,9 +160,8 @@ def get_k_history(code: str, beg: str = '16000101', end: str = '20500101', klt:
     # base_url = 'https://push2his.eastmoney.com/api/qt/stock/kline/get'
     url = base_url + '?' + urlencode(params)
     try:
-        json_response = requests.get(
-                url, headers=EastmoneyHeaders).json()
-    except:
+        json_response = _get_json_response(url, headers=EastmoneyHeaders)
+    except Exception:
         return pd.DataFrame()
     data = json_response['data']
     if data is None:
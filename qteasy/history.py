@@ -646,7 +646,7 @@ class HistoryPanel():
         out : HistoryPanel, 填充后的HistoryPanel对象
         """
         if not self.is_empty:
-            self._values = fill_nan_data(self._values, with_val)
+            self._values = fill_nan_data(self._values, with_val).astype(self._values.dtype, copy=False)
         return self
 
     def fillinf(self, with_val: [int, float, np.int, np.float]):
@@ -662,7 +662,7 @@ class HistoryPanel():
         out : HistoryPanel, 填充后的HistoryPanel对象
         """
         if not self.is_empty:
-            self._values = fill_inf_data(self._values, with_val)
+            self._values = fill_inf_data(self._values, with_val).astype(self._values.dtype, copy=False)
         return self
 
     def ffill(self, init_val=np.nan):
@@ -828,39 +828,14 @@ class HistoryPanel():
                                               len(combined_htypes)))
             combined_values.fill(fill_value)
             if same_shares:
-                if same_htypes:
-                    for hdate in combined_hdates:
-                        combined_hdate_id = labels_to_dict(combined_hdates, combined_hdates)
-                        this_hdate_id = labels_to_dict(this_hdates, this_hdates)
-                        other_hdate_id = labels_to_dict(other_hdates, other_hdates)
-                        if hdate in this_hdates:
-                            combined_values[:, combined_hdate_id[hdate], :] = self.values[:, this_hdate_id[hdate], :]
-                        else:
-                            combined_values[:, combined_hdate_id[hdate], :] = other.values[:, other_hdate_id[hdate], :]
-                elif same_hdates:
-                    for htype in combined_htypes:
-                        combined_htype_id = labels_to_dict(combined_htypes, combined_htypes)
-                        this_htype_id = labels_to_dict(this_htypes, this_htypes)
-                        other_htype_id = labels_to_dict(other_htypes, other_htypes)
-                        if htype in this_htypes:
-                            combined_values[:, :, combined_htype_id[htype]] = self.values[:, :, this_htype_id[htype]]
-                        else:
-                            combined_values[:, :, combined_htype_id[htype]] = other.values[:, :, other_htype_id[htype]]
-                else:
-                    for hdate in combined_hdates:
-                        for htype in combined_htypes:
-                            combined_hdate_id = labels_to_dict(combined_hdates, combined_hdates)
-                            this_hdate_id = labels_to_dict(this_hdates, this_hdates)
-                            other_hdate_id = labels_to_dict(other_hdates, other_hdates)
-                            combined_htype_id = labels_to_dict(combined_htypes, combined_htypes)
-                            this_htype_id = labels_to_dict(this_htypes, this_htypes)
-                            other_htype_id = labels_to_dict(other_htypes, other_htypes)
-                            if htype in this_htypes and hdate in this_hdates:
-                                combined_values[:, combined_hdate_id[hdate], combined_htype_id[htype]] = \
-                                    self.values[:, this_hdate_id[hdate], this_htype_id[htype]]
-                            elif htype in other_htypes and hdate in other_hdates:
-                                combined_values[:, combined_hdate_id[hdate], combined_htype_id[htype]] = \
-                                    other.values[:, other_hdate_id[hdate], other_htype_id[htype]]
+                # 分别计算两个HP的日期和数据类型在合并后HP中的位置，先整块写入other的数据，再整块写入
+                # self的数据，两者重叠的部分以self的数据为准
+                combined_hdate_id = labels_to_dict(combined_hdates, combined_hdates)
+                combined_htype_id = labels_to_dict(combined_htypes, combined_htypes)
+                for hp in (other, self):
+                    hdate_pos = np.array([combined_hdate_id[hdate] for hdate in hp.hdates], dtype='int')
+                    htype_pos = np.array([combined_htype_id[htype] for htype in hp.htypes], dtype='int')
+                    combined_values[:, hdate_pos[:, np.newaxis], htype_pos] = hp.values
             # TODO: implement this section 实现相同htype的HistoryPanel合并
             elif same_htypes:
                 raise NotImplementedError
@@ -873,11 +848,14 @@ class HistoryPanel():
                                 columns=combined_htypes)
 
     def as_type(self, dtype):
-        """ 将HistoryPanel的数据类型转换为dtype类型，dtype只能为'float'或'int'
+        """ 将HistoryPanel的数据类型转换为dtype类型，dtype只能为'float'、'float32'或'int'
+
+        HistoryPanel默认使用float64存储数据，当数据量很大且不需要很高的精度时，可以转换为
+        'float32'类型，节省一半的内存占用
 
         Parameters
         ----------
-        dtype: str, {'float', 'int'}
+        dtype: str, {'float', 'float32', 'int'}
             需要转换的目标数据类型
 
         Returns
@@ -889,11 +867,11 @@ class HistoryPanel():
         AssertionError
             当输入的数据类型不正确或输入除float/int外的其他数据类型时
         """
-        ALL_DTYPES = ['float', 'int']
+        ALL_DTYPES = ['float', 'float32', 'int']
         if not self.is_empty:
             assert isinstance(dtype, str), f'InputError, dtype should be a string, got {type(dtype)}'
             assert dtype in ALL_DTYPES, f'data type {dtype} is not recognized or not supported!'
-            self._values = self.values.astype(dtype)
+            self._values = self.values.astype(dtype, copy=False)
         return self
 
     def slice_to_dataframe(self,
@@ -988,8 +966,8 @@ class HistoryPanel():
             res_df = pd.DataFrame(v, index=self.hdates, columns=self.htypes)
 
         if dropna and inf_as_na:
-            with pd.option_context('mode.use_inf_as_na', True):
-                return res_df.dropna(how='all')
+            # inf与NaN同样视为缺失值，直接用numpy计算含有有效数据的行，无需切换pandas全局设置
+            return res_df.loc[np.isfinite(v).any(axis=1)]
         if dropna:
             return res_df.dropna(how='all')
 
@@ -1687,7 +1665,7 @@ def dataframe_to_hp(
     from collections import Iterable
     assert isinstance(df, pd.DataFrame), f'Input df should be pandas DataFrame! got {type(df)} instead.'
     if hdates is None:
-        hdates = df.rename(index=pd.to_datetime).index
+        hdates = _datetime_indexed(df).index
     assert isinstance(hdates, Iterable), f'TypeError, hdates should be iterable, got {type(hdates)} instead.'
     index_count = len(hdates)
     assert index_count == len(df.index), \
@@ -1790,6 +1768,24 @@ def from_multi_index_dataframe(df: pd.DataFrame):
     raise NotImplementedError
 
 
+def _datetime_indexed(df: pd.DataFrame) -> pd.DataFrame:
+    """ 返回index为DatetimeIndex的df，如果df的index已经是DatetimeIndex，直接返回df本身，否则
+    一次性转换整个index并返回新的df，不修改原df
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        需要转换index的DataFrame
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    if isinstance(df.index, pd.DatetimeIndex):
+        return df
+    return df.set_axis(pd.to_datetime(df.index, cache=True), axis=0)
+
+
 def stack_dataframes(dfs: [list, dict], dataframe_as: str = 'shares', shares=None, htypes=None, fill_value=None):
     """ 将多个dataframe组合成一个HistoryPanel.
 
@@ -1879,7 +1875,6 @@ def stack_dataframes(dfs: [list, dict], dataframe_as: str = 'shares', shares=Non
     if htypes is not None:
         if isinstance(htypes, str):
             htypes = str_to_list(htypes)
-    combined_index = []
     combined_shares = []
     combined_htypes = []
     # 检查输入参数是否正确
@@ -1906,12 +1901,23 @@ def stack_dataframes(dfs: [list, dict], dataframe_as: str = 'shares', shares=Non
     for df in dfs:
         assert isinstance(df, pd.DataFrame), \
             f'InputError, dfs should be a list of pandas DataFrame, got {type(df)} instead.'
-        combined_index.extend(df.rename(index=pd.to_datetime).index)
+    dfs = [_datetime_indexed(df) for df in dfs]
+    # 如果所有df的index和columns都完全相同（例如经过同样的重新采样），则不需要对齐数据
+    all_aligned = (len(dfs) > 0) and \
+        dfs[0].index.is_monotonic_increasing and dfs[0].index.is_unique and \
+        all(df.index.equals(dfs[0].index) and df.columns.equals(dfs[0].columns) for df in dfs)
+    # 所有df的index都已经是DatetimeIndex，直接使用Index.union合并
+    combined_index = dfs[0].index if all_aligned else pd.DatetimeIndex([])
+    for df in dfs:
+        if not all_aligned:
+            combined_index = combined_index.union(df.index)
         if dataframe_as == 'shares':
             combined_htypes.extend(df.columns)
         else:
             combined_shares.extend(df.columns)
-    dfs = [df.rename(index=pd.to_datetime) for df in dfs]
+    # 当所有df的index相同时，union直接返回原index，不会排序和去重，因此需要单独处理
+    if not (combined_index.is_monotonic_increasing and combined_index.is_unique):
+        combined_index = combined_index.unique().sort_values()
     # 合并htypes及shares，
     # 如果没有直接给出shares或htypes，使用他们的并集并排序
     # 如果直接给出了shares或htypes，直接使用并保持原始顺序
@@ -1925,27 +1931,39 @@ def stack_dataframes(dfs: [list, dict], dataframe_as: str = 'shares', shares=Non
         combined_shares.sort()
     elif (dataframe_as == 'htypes') and (shares is not None):
         combined_shares = shares
-    combined_index = list(set(combined_index))
+    if all_aligned and \
+            (list(dfs[0].columns) == (combined_htypes if dataframe_as == 'shares' else combined_shares)):
+        # 所有df已经对齐，直接将数据叠放为三维数组，不需要逐个reindex
+        if dataframe_as == 'shares':
+            res_values = np.stack([df.to_numpy(dtype='float') for df in dfs], axis=0)
+        else:
+            res_values = np.empty(shape=(len(combined_shares), len(combined_index), len(combined_htypes)))
+            for df_id, df in enumerate(dfs):
+                res_values[:, :, df_id] = df.to_numpy(dtype='float').T
+        return HistoryPanel(res_values,
+                            levels=combined_shares,
+                            rows=combined_index,
+                            columns=combined_htypes)
     htype_count = len(combined_htypes)
     share_count = len(combined_shares)
     index_count = len(combined_index)
-    combined_htypes_dict = dict(zip(combined_htypes, range(htype_count)))
-    combined_shares_dict = dict(zip(combined_shares, range(share_count)))
-    combined_index.sort()
     # 生成并复制数据
     res_values = np.zeros(shape=(share_count, index_count, htype_count))
     res_values.fill(fill_value)
+    # 每个df一次性reindex到完整的行列后整块写入，df中不存在的列以fill_value填充
+    # df中如果存在重名的列，以最后一列为准，去重后再reindex
     for df_id in range(len(dfs)):
-        extended_df = dfs[df_id].reindex(combined_index)
-        for col_name, series in extended_df.iteritems():
-            if dataframe_as == 'shares':
-                if col_name not in combined_htypes_dict:
-                    continue
-                res_values[df_id, :, combined_htypes_dict[col_name]] = series.values
-            else:
-                if col_name not in combined_shares_dict:
-                    continue
-                res_values[combined_shares_dict[col_name], :, df_id] = series.values
+        df = dfs[df_id]
+        if df.columns.has_duplicates:
+            df = df.loc[:, ~df.columns.duplicated(keep='last')]
+        if dataframe_as == 'shares':
+            extended_df = df.reindex(index=combined_index)
+            extended_df = extended_df.reindex(columns=combined_htypes, fill_value=fill_value)
+            res_values[df_id, :, :] = extended_df.to_numpy(dtype='float')
+        else:
+            extended_df = df.reindex(index=combined_index)
+            extended_df = extended_df.reindex(columns=combined_shares, fill_value=fill_value)
+            res_values[:, :, df_id] = extended_df.to_numpy(dtype='float').T
     return HistoryPanel(res_values,
                         levels=combined_shares,
                         rows=combined_index,
@@ -242,6 +242,40 @@ def get_position_by_id(pos_id, data_source=None):
     return position
 
 
+def get_positions_by_ids(pos_ids, data_source=None):
+    """ 通过一组pos_id一次性获取多个持仓的信息
+
+    与get_position_by_id()相同，但只读取一次持仓表
+
+    Parameters
+    ----------
+    pos_ids: list of int
+        持仓的id
+    data_source: str, optional
+        数据源的名称, 默认为None, 表示使用默认的数据源
+
+    Returns
+    -------
+    pd.DataFrame: 以pos_id为index的持仓信息，列与get_position_by_id()返回的dict相同
+
+    Raises
+    ------
+    RuntimeError: 如果任意持仓不存在，则报错
+    """
+
+    import qteasy as qt
+    if data_source is None:
+        data_source = qt.QT_DATA_SOURCE
+    if not isinstance(data_source, qt.DataSource):
+        raise TypeError(f'data_source must be a DataSource instance, got {type(data_source)} instead')
+
+    pos_ids = list(set(pos_ids))
+    positions = data_source.read_sys_table_data('sys_op_positions', record_id=pos_ids)
+    if (positions is None) or any(pos_id not in positions.index for pos_id in pos_ids):
+        raise RuntimeError('Position not found!')
+    return positions
+
+
 def get_position_ids(account_id, symbol=None, position_type=None, data_source=None):
     """ 根据symbol和position_type获取账户的持仓id, 如果没有持仓，则返回空列表, 如果有多个持仓，则返回所有持仓的id
 
@@ -352,6 +386,84 @@ def get_or_create_position(account_id: int, symbol: str, position_type: str, dat
     return position.index[0]
 
 
+def get_or_create_positions(account_id: int, symbols, position_types, data_source: DataSource = None):
+    """ 批量获取账户的持仓, 如果某个持仓不存在，则创建一条新的持仓记录
+
+    与get_or_create_position()相同，但只读取一次持仓表，适用于一次处理多个交易标的的情况
+
+    Parameters
+    ----------
+    account_id: int
+        账户的id
+    symbols: list of str
+        交易标的的代码
+    position_types: list of str, {'long', 'short'}
+        持仓类型, 与symbols一一对应, 'long'表示多头持仓, 'short'表示空头持仓
+    data_source: DataSource, optional
+        数据源的名称, 默认为None, 表示使用默认的数据源
+
+    Returns
+    -------
+    list of int: 与symbols顺序一致的持仓记录id，不存在的持仓会被创建为新的空持仓记录
+    """
+
+    from qteasy import DataSource, QT_DATA_SOURCE
+    if data_source is None:
+        data_source = QT_DATA_SOURCE
+    if not isinstance(data_source, DataSource):
+        raise TypeError(f'data_source must be a DataSource instance, got {type(data_source)} instead')
+    if len(symbols) != len(position_types):
+        raise ValueError(f'Length of symbols ({len(symbols)}) and position_types ({len(position_types)}) '
+                         f'must be the same')
+
+    # 检查account_id是否存在，如果不存在，则报错，否则创建的持仓记录将无法关联到账户
+    account = get_account(account_id, data_source=data_source)
+    if account is None:
+        raise RuntimeError(f'account_id {account_id} not found!')
+
+    # 一次读取账户的所有持仓，建立(symbol, position)到持仓id的映射
+    positions = data_source.read_sys_table_data(
+            table='sys_op_positions',
+            record_id=None,
+            account_id=account_id,
+    )
+    existing_positions = {}
+    if positions is not None:
+        for pos_id, symbol, position_type in zip(positions.index, positions['symbol'], positions['position']):
+            if (symbol, position_type) in existing_positions:
+                raise RuntimeError(f'position record is duplicated for {symbol}-{position_type}')
+            existing_positions[(symbol, position_type)] = pos_id
+
+    # 检查不存在的持仓的symbol和position_type是否合法，全部合法后一次写入所有新的空持仓记录
+    new_positions = {}  # 用dict保持新持仓首次出现的顺序
+    for symbol, position_type in zip(symbols, position_types):
+        if ((symbol, position_type) in existing_positions) or ((symbol, position_type) in new_positions):
+            continue
+        if not isinstance(symbol, str):
+            raise TypeError(f'symbol must be a str, got {type(symbol)} instead')
+        if not isinstance(position_type, str):
+            raise TypeError(f'position_type must be a str, got {type(position_type)} instead')
+        if position_type not in ('long', 'short'):
+            raise ValueError(f'position_type must be "long" or "short", got {position_type} instead')
+        new_positions[(symbol, position_type)] = None
+    new_pos_ids = data_source.insert_sys_table_records(
+            'sys_op_positions',
+            [
+                {
+                    'account_id':    account_id,
+                    'symbol':        symbol,
+                    'position':      position_type,
+                    'qty':           0,
+                    'available_qty': 0,
+                    'cost':          0,
+                } for symbol, position_type in new_positions
+            ]
+    )
+    existing_positions.update(zip(new_positions.keys(), new_pos_ids))
+
+    return [existing_positions[(symbol, position_type)] for symbol, position_type in zip(symbols, position_types)]
+
+
 def update_position(position_id, data_source=None, **position_data):
     """ 更新账户的持仓，包括持仓的数量和可用数量，account_id, position和symbol不可修改
 
@@ -383,6 +495,63 @@ def update_position(position_id, data_source=None, **position_data):
     if position is None:
         raise RuntimeError(f'position_id {position_id} not found!')
 
+    position = _apply_position_change(position, **position_data)
+    data_source.update_sys_table_data('sys_op_positions', record_id=position_id, **position)
+
+
+def update_positions(position_changes, data_source=None):
+    """ 一次更新多个持仓，与逐个调用update_position()的结果相同，但持仓表只需要读写一次
+
+    Parameters
+    ----------
+    position_changes: dict of {int: dict}
+        持仓的id及其需要修改的数据，数据格式与update_position()的position_data相同，如:
+        {1: {'qty_change': 100, 'available_qty_change': 100}}
+    data_source: str, optional
+        数据源的名称, 默认为None, 表示使用默认的数据源
+
+    Returns
+    -------
+    None
+    """
+
+    import qteasy as qt
+    if data_source is None:
+        data_source = qt.QT_DATA_SOURCE
+    if not isinstance(data_source, qt.DataSource):
+        raise TypeError(f'data_source must be a DataSource instance, got {type(data_source)} instead')
+    if len(position_changes) == 0:
+        return
+
+    # 一次读取所有持仓，全部检查通过后再一次写入，任何一个持仓不合法时都不会修改持仓
+    positions = data_source.read_sys_table_data('sys_op_positions', record_id=list(position_changes.keys()))
+    missing_ids = [pos_id for pos_id in position_changes
+                   if (positions is None) or (pos_id not in positions.index)]
+    if missing_ids:
+        raise RuntimeError(f'position_id {missing_ids} not found!')
+
+    records = {
+        pos_id: _apply_position_change(positions.loc[pos_id].to_dict(), **position_data)
+        for pos_id, position_data in position_changes.items()
+    }
+    data_source.update_sys_table_records('sys_op_positions', records)
+
+
+def _apply_position_change(position, **position_data):
+    """ 将持仓数量、可用数量和成本的变化应用到持仓数据上，并检查修改后的持仓是否合法
+
+    Parameters
+    ----------
+    position: dict
+        从持仓表中读取的一条持仓数据
+    position_data: dict, optional, {'qty_change': float, 'available_qty_change': float, 'cost': float}
+        持仓的数据，只能修改qty, available_qty, cost 这三类数据中的任意一个或多个
+
+    Returns
+    -------
+    position: dict, 修改后的持仓数据
+    """
+
     qty_change = position_data.get('qty_change', 0.0)
     if not isinstance(qty_change, (int, float, np.int64, np.float64)):
         raise TypeError(f'qty_change must be a int or float, got {type(qty_change)} instead')
@@ -410,7 +579,7 @@ def update_position(position_id, data_source=None, **position_data):
     if position['qty'] < 0:
         raise RuntimeError(f'qty ({position["qty"]}) cannot be less than 0!')
 
-    data_source.update_sys_table_data('sys_op_positions', record_id=position_id, **position)
+    return position
 
 
 def get_account_positions(account_id, data_source=None):
@@ -476,7 +645,7 @@ def get_account_cash_availabilities(account_id, data_source=None):
     return account['cash_amount'], account['available_cash'], account['total_invest']
 
 
-def get_account_position_availabilities(account_id, shares=None, data_source=None):
+def get_account_position_availabilities(account_id, shares=None, data_source=None, positions=None):
     """ 根据account_id读取账户的持仓，筛选出与shares相同的symbol的持仓，返回两个ndarray，分别为
     每一个share对应的持仓的数量和可用数量
 
@@ -488,6 +657,8 @@ def get_account_position_availabilities(account_id, shares=None, data_source=Non
         需要输出的持仓的symbol列表, 如果不给出shares，则返回所有持仓的数量和可用数量
     data_source: str, optional
         数据源的名称, 默认为None, 表示使用默认的数据源
+    positions: pd.DataFrame, optional
+        已经由get_account_positions()读取的账户持仓，给出时不再重复读取持仓表
 
     Returns
     -------
@@ -499,10 +670,11 @@ def get_account_position_availabilities(account_id, shares=None, data_source=Non
     """
 
     # 根据account_id读取账户的全部持仓
-    positions = get_account_positions(account_id=account_id, data_source=data_source)
+    if positions is None:
+        positions = get_account_positions(account_id=account_id, data_source=data_source)
 
     if positions is None:
-        return shares, np.zeros(len(shares)), np.zeros(len(shares))
+        return shares, np.zeros(len(shares)), np.zeros(len(shares)), np.zeros(len(shares))
     # 如果没有给出shares，则读取账户中所有持仓的symbol
     if shares is None:
         shares = positions['symbol'].unique()
@@ -512,53 +684,40 @@ def get_account_position_availabilities(account_id, shares=None, data_source=Non
     if not isinstance(shares, (list, tuple, np.ndarray)):
         raise TypeError(f'shares must be a list, tuple or ndarray, got {type(shares)} instead')
 
-    own_amounts = []
-    available_amounts = []
-    costs = []
+    # 只有持仓数量大于0的持仓才是有效持仓，同一个share同时存在多头和空头持仓时报错
+    positions = positions.loc[positions['qty'] > 0]
+    if positions.empty:
+        # 没有有效持仓时，空的持仓表中可能没有cost等字段，直接返回全0
+        return shares, np.zeros(len(shares)), np.zeros(len(shares)), np.zeros(len(shares))
+    duplicated_symbols = set(positions['symbol'].loc[positions['symbol'].duplicated()])
     for share in shares:
-        # 检查symbol为share的持仓是否存在
-        position = positions[(positions['symbol'] == share) & (positions['qty'] > 0)]
-        if position.empty:
-            own_amounts.append(0.0)
-            available_amounts.append(0.0)
-            costs.append(0.0)
-            continue
-        # 如果同时存在多头和空头持仓，则报错
-        if len(position) > 1:
+        if share in duplicated_symbols:
             raise RuntimeError(f'position for {share} has more than one position!')
-        position = position.iloc[0]
-        # 如果存在多头持仓，则将多头持仓的数量和可用数量放入列表
-        if position['position'] == 'long':
-            own_amounts.append(position['qty'])
-            available_amounts.append(position['available_qty'])
-            costs.append(position['cost'])
-            continue
-        # 如果存在空头持仓，则将空头持仓的数量和可用数量乘以-1并放入列表
-        if position['position'] == 'short':
-            own_amounts.append(-1 * position['qty'])
-            available_amounts.append(-1 * position['available_qty'])
-            costs.append(position['cost'])
-            continue
-    # 如果列表长度与shares长度不相等，则报错
-    if len(own_amounts) != len(shares):
-        raise RuntimeError(f'own_amounts length ({len(own_amounts)}) is not equal to shares length ({len(shares)})')
-    if len(available_amounts) != len(shares):
-        raise RuntimeError(f'available_amounts length ({len(available_amounts)}) is not equal to '
-                           f'shares length ({len(shares)})')
-    if len(costs) != len(shares):
-        raise RuntimeError(f'costs length ({len(costs)}) is not equal to shares length ({len(shares)})')
-    # 将列表转换为ndarray并返回
+    positions = positions.drop_duplicates(subset='symbol', keep=False)
+
+    # 一次性按照shares的顺序查找持仓的位置，空头持仓的数量和可用数量乘以-1，不存在的持仓填充0
+    pos_idx = pd.Index(positions['symbol']).get_indexer(shares)
+    found = pos_idx >= 0
+    pos_idx = pos_idx[found]
+    signs = np.where(positions['position'].values[pos_idx] == 'short', -1., 1.)
+    own_amounts = np.zeros(len(shares))
+    available_amounts = np.zeros(len(shares))
+    costs = np.zeros(len(shares))
+    own_amounts[found] = positions['qty'].values[pos_idx] * signs
+    available_amounts[found] = positions['available_qty'].values[pos_idx] * signs
+    costs[found] = positions['cost'].values[pos_idx]
+
     result = (
         shares,
-        np.array(own_amounts).astype('float'),
-        np.array(available_amounts).astype('float'),
-        np.array(costs).astype('float')
+        own_amounts,
+        available_amounts,
+        costs,
     )
 
     return result
 
 
-def get_account_position_details(account_id, shares=None, data_source=None):
+def get_account_position_details(account_id, shares=None, data_source=None, orient='columns'):
     """ 根据account_id读取账户的持仓，筛选出与shares相同的symbol的持仓，返回一个DataFrame，包含
     每一个share对应的持仓的symbol，position，qty和可用数量。
 
@@ -570,6 +729,10 @@ def get_account_position_details(account_id, shares=None, data_source=None):
         需要输出的持仓的symbol列表, 如果不给出shares，则返回所有持仓的数量和可用数量
     data_source: str, optional
         数据源的名称, 默认为None, 表示使用默认的数据源
+    orient: str, {'columns', 'index'}, default 'columns'
+        symbol在返回的DataFrame中的方向:
+        - 'columns': symbol为列，行为'qty', 'available_qty'和'cost'
+        - 'index': symbol为行，列为'qty', 'available_qty'和'cost'
 
     Returns
     -------
@@ -577,6 +740,9 @@ def get_account_position_details(account_id, shares=None, data_source=None):
         account持仓的symbol，qty, available_qty和cost, symbol与shares的顺序一致
     """
 
+    if orient not in ('columns', 'index'):
+        raise ValueError(f'orient must be "columns" or "index", got {orient} instead')
+
     # 根据account_id读取账户的全部持仓
     symbols, amounts, available_amounts, costs = get_account_position_availabilities(
             account_id=account_id,
@@ -591,11 +757,13 @@ def get_account_position_details(account_id, shares=None, data_source=None):
                 'cost': costs,
             },
             index=symbols,
-    ).T
+    )
+    if orient == 'columns':
+        positions = positions.T
     return positions
 
 
-# 4 foundational functions for trade order
+# 5 foundational functions for trade order
 def record_trade_order(order, data_source=None):
     """ 将交易信号写入数据库
 
@@ -627,7 +795,41 @@ def record_trade_order(order, data_source=None):
     if not isinstance(data_source, qt.DataSource):
         raise TypeError(f'data_source must be a DataSource instance, got {type(data_source)} instead')
 
-    # 检查交易信号的格式和数据合法性
+    _check_trade_order(order)
+
+    return data_source.insert_sys_table_data('sys_op_trade_orders', **order)
+
+
+def record_trade_orders(orders, data_source=None):
+    """ 将多个交易信号一次性写入数据库
+
+    Parameters
+    ----------
+    orders: list of dict
+        标准形式的交易订单，格式与record_trade_order()相同
+    data_source: str, optional
+        数据源的名称, 默认为None, 表示使用默认的数据源
+
+    Returns
+    -------
+    order_ids: list of int
+    写入数据库的交易信号的id，顺序与orders一致
+    """
+
+    import qteasy as qt
+    if data_source is None:
+        data_source = qt.QT_DATA_SOURCE
+    if not isinstance(data_source, qt.DataSource):
+        raise TypeError(f'data_source must be a DataSource instance, got {type(data_source)} instead')
+
+    for order in orders:
+        _check_trade_order(order)
+
+    return data_source.insert_sys_table_records('sys_op_trade_orders', orders)
+
+
+def _check_trade_order(order):
+    """ 检查交易信号的格式和数据合法性，不合法时抛出异常 """
     if not isinstance(order, dict):
         raise TypeError(f'signal must be a dict, got {type(order)} instead')
     if not isinstance(order['pos_id'], (int, np.int64)):
@@ -645,8 +847,6 @@ def record_trade_order(order, data_source=None):
     if order['price'] <= 0:
         raise RuntimeError(f'signal["price"] ({order["price"]}) must be greater than 0!')
 
-    return data_source.insert_sys_table_data('sys_op_trade_orders', **order)
-
 
 def read_trade_order(order_id, data_source=None):
     """ 根据order_id从数据库中读取交易信号
@@ -675,6 +875,33 @@ def read_trade_order(order_id, data_source=None):
     return data_source.read_sys_table_data('sys_op_trade_orders', record_id=order_id)
 
 
+def read_trade_orders(order_ids, data_source=None):
+    """ 根据一组order_id从数据库中一次性读取多个交易信号
+
+    Parameters
+    ----------
+    order_ids: list of int
+        交易信号的id
+    data_source: str, optional
+        数据源的名称, 默认为None, 表示使用默认的数据源
+
+    Returns
+    -------
+    signals: pd.DataFrame
+        以order_id为index的交易信号，没有找到任何交易信号时返回None
+    """
+    if any(not isinstance(order_id, (int, np.int64)) for order_id in order_ids):
+        raise TypeError(f'order_ids must be a list of int, got {order_ids} instead')
+
+    import qteasy as qt
+    if data_source is None:
+        data_source = qt.QT_DATA_SOURCE
+    if not isinstance(data_source, qt.DataSource):
+        raise TypeError(f'data_source must be a DataSource instance, got {type(data_source)} instead')
+
+    return data_source.read_sys_table_data('sys_op_trade_orders', record_id=list(order_ids))
+
+
 def update_trade_order(order_id, data_source=None, status=None, qty=None, raise_if_status_wrong=False):
     """ 更新数据库中trade_signal的状态或其他信，这里只操作trade_signal，不处理交易结果
 
@@ -768,6 +995,64 @@ def update_trade_order(order_id, data_source=None, status=None, qty=None, raise_
     return
 
 
+def update_trade_orders_status(order_ids, status, data_source=None):
+    """ 将多个交易信号的状态一次性更新为status
+
+    与逐个调用update_trade_order(order_id, status=status)相同，状态的更新遵循同样的规律，
+    但所有交易信号只需要读写一次数据表。状态不能更新为status的交易信号不会被更新。
+    状态由'created'更新为'submitted'时，同时设置'submitted_time'
+
+    Parameters
+    ----------
+    order_ids: list of int
+        交易信号的id
+    status: str, {'submitted', 'canceled', 'partial-filled', 'filled'}
+        交易信号的新状态
+    data_source: str, optional
+        数据源的名称, 默认为None, 表示使用默认的数据源
+
+    Returns
+    -------
+    order_ids: list of int, 更新成功的交易信号的id
+
+    Raises
+    ------
+    RuntimeError
+        如果status不合法，或者任意交易信号读取失败，则抛出RuntimeError
+    """
+
+    import qteasy as qt
+    if data_source is None:
+        data_source = qt.QT_DATA_SOURCE
+    if not isinstance(data_source, qt.DataSource):
+        raise TypeError(f'data_source must be a DataSource instance, got {type(data_source)} instead')
+    if not isinstance(status, str):
+        raise TypeError(f'status must be a str, got {type(status)} instead')
+    if status not in ['created', 'submitted', 'canceled', 'partial-filled', 'filled']:
+        raise RuntimeError(f'status ({status}) not in [created, submitted, canceled, partial-filled, filled]!')
+    if len(order_ids) == 0:
+        return []
+
+    trade_signals = read_trade_orders(order_ids, data_source=data_source)
+    if (trade_signals is None) or any(order_id not in trade_signals.index for order_id in order_ids):
+        raise RuntimeError(f'Trade signals (order_ids = {order_ids}) not found!')
+
+    # 每种当前状态允许更新到的新状态，与update_trade_order()相同
+    allowed_status = {
+        'created':        ['submitted'],
+        'submitted':      ['canceled', 'partial-filled', 'filled'],
+        'partial-filled': ['canceled', 'filled'],
+    }
+    new_data = {'status': status}
+    if status == 'submitted':
+        new_data['submitted_time'] = pd.to_datetime('today').strftime('%Y-%m-%d %H:%M:%S')
+    records = {
+        order_id: new_data for order_id, current_status in trade_signals['status'].items()
+        if status in allowed_status.get(current_status, [])
+    }
+    return data_source.update_sys_table_records('sys_op_trade_orders', records)
+
+
 def query_trade_orders(account_id,
                        symbol=None,
                        position=None,
@@ -789,8 +1074,8 @@ def query_trade_orders(account_id,
         交易方向, 默认为None, 表示不限制, 'buy' 表示买入, 'sell' 表示卖出
     order_type: str, optional, {'market', 'limit', 'stop', 'stop_limit'}
         交易类型, 默认为None, 表示不限制, 'market' 表示市价单, 'limit' 表示限价单, 'stop' 表示止损单, 'stop_limit' 表示止损限价单
-    status: str, optional, {'created', 'submitted', 'canceled', 'partial-filled', 'filled'}
-        交易信号状态
+    status: str or list of str, optional, {'created', 'submitted', 'canceled', 'partial-filled', 'filled'}
+        交易信号状态, 如果给出list，则返回状态为其中任意一种的订单
     data_source: str, optional
         数据源的名称, 默认为None, 表示使用默认的数据源
 
@@ -801,7 +1086,7 @@ def query_trade_orders(account_id,
     """
 
     # TODO: move this function to trading_util.py
-    # TODO: allow list of str as input for symbol, position, direction, order_type, status
+    # TODO: allow list of str as input for symbol, position, direction, order_type
 
     import qteasy as qt
     if data_source is None:
@@ -822,19 +1107,18 @@ def query_trade_orders(account_id,
     if status is not None:
         data_filter['status'] = status
 
-    res = []
-    for pos_id in pos_ids:
-        res.append(
-                data_source.read_sys_table_data(
-                        'sys_op_trade_orders',
-                        pos_id=pos_id,
-                        **data_filter,
-                )
-        )
-    if all(r is None for r in res):
+    # 一次读取所有持仓的订单，避免对每个持仓分别读取整张订单表
+    res = data_source.read_sys_table_data(
+            'sys_op_trade_orders',
+            pos_id=list(pos_ids),
+            **data_filter,
+    )
+    if res is None:
         return pd.DataFrame(columns=['pos_id', 'direction', 'order_type', 'qty', 'price', 'submitted_time', 'status'])
 
-    return pd.concat(res)
+    # 按照pos_ids的顺序排列订单，与逐个持仓查询的结果顺序保持一致
+    pos_order = res['pos_id'].map({pos_id: i for i, pos_id in enumerate(pos_ids)})
+    return res.iloc[np.argsort(pos_order.to_numpy(), kind='stable')]
 
 
 # 2 2nd level functions for trade signal
@@ -921,13 +1205,11 @@ def save_parsed_trade_orders(account_id, symbols, positions, directions, quantit
             len(symbols) != len(prices):
         raise ValueError('Length of symbols, positions, directions, quantities and prices must be the same')
 
-    order_ids = []
-    # 逐个处理所有的交易信号要素
-    for sym, pos, dirc, qty, price in zip(symbols, positions, directions, quantities, prices):
-        # 获取pos_id, 如果pos_id不存在，则新建一个posiiton
-        pos_id = get_or_create_position(account_id, sym, pos, data_source=data_source)
-        # 生成交易信号dict
-        trade_order = {
+    # 获取所有的pos_id, 如果pos_id不存在，则新建一个posiiton
+    pos_ids = get_or_create_positions(account_id, symbols, positions, data_source=data_source)
+    # 生成交易信号dict
+    trade_orders = [
+        {
             'pos_id': pos_id,
             'direction': dirc,
             'order_type': 'market',  # TODO: 交易信号的order_type应该是可配置的，增加其他配置选项
@@ -935,11 +1217,10 @@ def save_parsed_trade_orders(account_id, symbols, positions, directions, quantit
             'price': price,
             'submitted_time': None,
             'status': 'created'
-        }
-        sig_id = record_trade_order(trade_order, data_source=data_source)
-        order_ids.append(sig_id)
+        } for pos_id, dirc, qty, price in zip(pos_ids, directions, quantities, prices)
+    ]
 
-    return order_ids
+    return record_trade_orders(trade_orders, data_source=data_source)
 
 
 # 5 foundational functions for trade result
@@ -959,6 +1240,49 @@ def write_trade_result(trade_result, data_source=None):
         交易结果的id
     """
 
+    _check_trade_result(trade_result)
+
+    import qteasy as qt
+    if data_source is None:
+        data_source = qt.QT_DATA_SOURCE
+    if not isinstance(data_source, qt.DataSource):
+        raise TypeError(f'data_source must be a DataSource instance, got {type(data_source)} instead')
+
+    result_id = data_source.insert_sys_table_data('sys_op_trade_results', **trade_result)
+    return result_id
+
+
+def write_trade_results(trade_results, data_source=None):
+    """ 将多个交易结果一次性写入数据库, 并返回交易结果的id
+
+    Parameters
+    ----------
+    trade_results: list of dict
+        交易结果，格式与write_trade_result()相同
+    data_source: str, optional
+        数据源的名称, 默认为None, 表示使用默认的数据源
+
+    Returns
+    -------
+    result_ids: list of int
+        交易结果的id，顺序与trade_results一致
+    """
+
+    # 所有交易结果都合法时才写入数据库
+    for trade_result in trade_results:
+        _check_trade_result(trade_result)
+
+    import qteasy as qt
+    if data_source is None:
+        data_source = qt.QT_DATA_SOURCE
+    if not isinstance(data_source, qt.DataSource):
+        raise TypeError(f'data_source must be a DataSource instance, got {type(data_source)} instead')
+
+    return data_source.insert_sys_table_records('sys_op_trade_results', trade_results)
+
+
+def _check_trade_result(trade_result):
+    """ 检查交易结果的格式和数据合法性，不合法时抛出异常，execution_time会被转换为标准格式的字符串 """
     if not isinstance(trade_result, dict):
         raise TypeError('trade_results must be a dict')
 
@@ -1003,15 +1327,6 @@ def write_trade_result(trade_result, data_source=None):
     if trade_result['delivery_status'] not in ['ND', 'DL']:
         raise ValueError(f'delivery_status can only be ND or DL, got {trade_result["delivery_status"]} instead')
 
-    import qteasy as qt
-    if data_source is None:
-        data_source = qt.QT_DATA_SOURCE
-    if not isinstance(data_source, qt.DataSource):
-        raise TypeError(f'data_source must be a DataSource instance, got {type(data_source)} instead')
-
-    result_id = data_source.insert_sys_table_data('sys_op_trade_results', **trade_result)
-    return result_id
-
 
 def update_trade_result(result_id, delivery_status, data_source=None):
     """ 更新交易结果的delivery_status
@@ -11,15 +11,26 @@
 # trading orders and submit to class Broker
 # ======================================
 
-import time
+import os
+import re
 import sys
+import time
+import traceback
+import datetime as dt
 
 import pandas as pd
 import numpy as np
 import shutil
 
-from threading import Timer
-from queue import Queue
+from threading import Timer, Thread
+from functools import lru_cache
+from bisect import bisect_right
+from queue import Queue, Empty
+try:
+    from queue import SimpleQueue
+except ImportError:  # python 3.6中没有SimpleQueue
+    SimpleQueue = Queue
+from collections import deque
 from cmd import Cmd
 from rich import print as rprint
 
@@ -27,15 +38,46 @@ import qteasy
 from qteasy import Operator, DataSource, ConfigDict
 from qteasy.core import check_and_prepare_live_trade_data
 from qteasy.utilfuncs import str_to_list, TIME_FREQ_LEVELS, parse_freq_string, sec_to_duration, adjust_string_length
-from qteasy.utilfuncs import get_current_tz_datetime
+from qteasy.utilfuncs import get_current_tz_datetime, is_market_trade_day, prev_market_trade_day, is_number_like
+from qteasy.utilfuncs import is_complete_cn_stock_symbol_like, is_cn_stock_symbol_like, TS_CODE_IDENTIFIER_CN_STOCK
 from qteasy.broker import Broker
 from qteasy.trade_recording import get_account, get_account_position_details, get_account_position_availabilities
 from qteasy.trade_recording import get_account_cash_availabilities, query_trade_orders, record_trade_order
-from qteasy.trade_recording import new_account, get_or_create_position, update_position
-from qteasy.trading_util import parse_trade_signal, submit_order, process_trade_result
-from qteasy.trading_util import process_trade_delivery, create_daily_task_schedule, cancel_order
+from qteasy.trade_recording import record_trade_orders, new_account, get_or_create_position, get_or_create_positions
+from qteasy.trade_recording import update_position, get_position_by_id, get_position_ids, update_account_balance
+from qteasy.trade_recording import update_positions
+from qteasy.trade_recording import get_account_positions, read_trade_order_detail, read_trade_result_by_id
+from qteasy.trade_recording import read_trade_results_by_order_id
+from qteasy.trading_util import parse_trade_signal, submit_order, submit_orders, process_trade_result
+from qteasy.trading_util import process_trade_delivery, create_daily_task_schedule, cancel_orders
 from qteasy.trading_util import get_last_trade_result_summary, get_symbol_names
 
+# 转发交易结果的线程每次等待broker交易结果的最长时间（秒），超时后检查Trader是否已经停止
+BROKER_RESULT_WAIT_TIMEOUT = 1
+# 每个process_result_batch任务最多包含的交易结果数量，更多的结果分为多个任务处理，避免单个任务占用主循环过久
+BROKER_RESULT_BATCH_SIZE = 256
+# TraderShell在dashboard模式下每次等待新消息的最长时间（秒），超时后检查shell状态和是否需要刷新实时价格
+SHELL_MESSAGE_WAIT_TIMEOUT = 0.05
+# 日程中任务时间的精度，同一时刻运行的多组策略共享同一次实时数据下载
+LIVE_DATA_FETCH_TICK = 'min'
+# 指定时区的当前时间与本地时间相差小于这个值时，认为指定时区就是本地时区，此后直接读取本地时间
+LOCAL_TIME_ZONE_TOLERANCE = dt.timedelta(seconds=1)
+
+# 初始化任务日程时，按当前时间所处的交易时段（上午开盘前、上午交易、午休、下午交易、收盘后）决定删除哪些过期的任务，
+# 每个时段给出需要保留的过期任务名称（None表示保留所有任务）以及调试信息，时段由bisect按开收盘时间查找
+SCHEDULE_EXPIRED_TASK_EXEMPTIONS = (
+    (None,
+     'before market morning open, keeping all tasks'),
+    (frozenset({'pre_open', 'open_market'}),
+     'market open, removing all tasks before current time except pre_open and open_market'),
+    (frozenset({'pre_open', 'open_market', 'sleep'}),
+     'before market afternoon open, removing all tasks before current time except pre_open, open_market and sleep'),
+    (frozenset({'pre_open', 'open_market'}),
+     'market afternoon open, removing all tasks before current time except pre_open and open_market'),
+    (frozenset({'post_close'}),
+     'market closed, removing all tasks before current time except post_close'),
+)
+
 UNIT_TO_TABLE = {
             'h':     'stock_hourly',
             '30min': 'stock_30min',
@@ -46,6 +88,48 @@ UNIT_TO_TABLE = {
         }
 
 
+@lru_cache(maxsize=1024)
+def _parse_task_time(task_time):
+    """ 将任务日程中的任务时间字符串如'09:30:00'解析为datetime.time
+
+    任务日程在一天中不会改变，Trader的主循环每次检查日程时都会解析同样的时间字符串，因此缓存解析结果
+
+    Parameters
+    ----------
+    task_time: str
+        任务日程中的任务时间
+
+    Returns
+    -------
+    datetime.time
+    """
+    return pd.to_datetime(task_time).time()
+
+
+@lru_cache(maxsize=256)
+def _parse_strategy_run_freqs(run_freqs):
+    """ 找到一组策略运行频率中最高的频率，并将其解析为duration和unit
+
+    同一组策略每次运行时的运行频率通常不变，因此以运行频率组合为key缓存结果，策略运行频率被修改后key随之改变
+
+    Parameters
+    ----------
+    run_freqs: tuple of str
+        所有需要运行的策略的运行频率，大写字符串
+
+    Returns
+    -------
+    tuple: (max_strategy_freq, duration, unit)
+    """
+    max_strategy_freq = 'T'
+    for freq in run_freqs:
+        if TIME_FREQ_LEVELS[freq] < TIME_FREQ_LEVELS[max_strategy_freq]:
+            max_strategy_freq = freq
+    # 将类似于'2H'或'15min'的时间频率转化为两个变量：duration和unit (duration=2, unit='H')/ (duration=15, unit='min')
+    duration, unit, _ = parse_freq_string(max_strategy_freq, std_freq_only=False)
+    return max_strategy_freq, duration, unit
+
+
 def parse_shell_argument(arg: str = None, default=None, command_name=None) -> list:
     """ 解析输入的参数, 返回解析后的参数列表，
 
@@ -94,7 +178,6 @@ def parse_shell_argument(arg: str = None, default=None, command_name=None) -> li
                 example_arg = "--" + arg
 
         if example_arg:
-            from rich import print as rprint
             rprint(f'[bold red]FutureWarning[/bold red]: plain style parameters will be deprecated in future versions, '
                    f'use "{command_name} {example_arg}" instead\n')
 
@@ -207,7 +290,6 @@ class TraderShell(Cmd):
         status
         """
 
-        from rich import print as rprint
         if arg:
             rprint(f'status command does not accept arguments\n')
         rprint(f'current trader status: {self.trader.status} \n'
@@ -339,7 +421,6 @@ class TraderShell(Cmd):
         watch
         """
 
-        from rich import print as rprint
         args = parse_shell_argument(arg, command_name='watch')
         if not args:
             sys.stdout.write(f'Current watch list: {self._watch_list}\n'
@@ -349,8 +430,6 @@ class TraderShell(Cmd):
             arg_count = len(args)
             if arg_count > 5:
                 args = args[:5]
-        from .utilfuncs import TS_CODE_IDENTIFIER_CN_STOCK
-        import re
         for arg in args:
             # 如果arg=='--position' 或者 '--positions'，则将当前持仓量最大的股票代码添加到watch list
             if arg in ['--position', '--positions', '-pos', '-p']:
@@ -416,7 +495,6 @@ class TraderShell(Cmd):
                 return
             if args[3] in ['--short', '-s']:
                 position = 'short'
-        from qteasy.utilfuncs import is_complete_cn_stock_symbol_like
         if not is_complete_cn_stock_symbol_like(symbol):
             print(f'Wrong symbol is given: {symbol}, please check your input!')
             return
@@ -443,6 +521,7 @@ class TraderShell(Cmd):
         if submit_order(order_id=order_id, data_source=datasource) is not None:
             trade_order['order_id'] = order_id
             broker.order_queue.put(trade_order)
+            self._trader._invalidate_account_cache()
         pass
 
     def do_sell(self, arg):
@@ -490,7 +569,6 @@ class TraderShell(Cmd):
                 return
             if args[3] in ['--short', '-s']:
                 position = 'short'
-        from qteasy.utilfuncs import is_complete_cn_stock_symbol_like
         if not is_complete_cn_stock_symbol_like(symbol):
             print(f'Wrong symbol is given: {symbol}, please check your input!')
             return
@@ -517,6 +595,7 @@ class TraderShell(Cmd):
         if submit_order(order_id=order_id, data_source=datasource) is not None:
             trade_order['order_id'] = order_id
             broker.order_queue.put(trade_order)
+            self._trader._invalidate_account_cache()
         pass
 
     def do_positions(self, arg):
@@ -532,7 +611,6 @@ class TraderShell(Cmd):
         if arg:
             sys.stdout.write(f'positions command does not accept arguments\n')
             return False
-        from rich import print as rprint
         print(f'current positions: \n')
         pos = self._trader.account_position_info
         if pos.empty:
@@ -659,8 +737,6 @@ class TraderShell(Cmd):
         """
 
         from qteasy._arg_validators import _vkwargs_to_text
-        from rich import print as rprint
-        import shutil
         column_width, _ = shutil.get_terminal_size()
         column_width = int(column_width * 0.75) if column_width > 120 else column_width
         args = parse_shell_argument(arg, command_name='config')
@@ -707,7 +783,6 @@ class TraderShell(Cmd):
             except Exception as e:
                 print(f'Error: {e}')
                 if self.trader.debug:
-                    import traceback
                     traceback.print_exc()
             return
         else:
@@ -725,7 +800,6 @@ class TraderShell(Cmd):
         history [symbol]
         """
 
-        from rich import print as rprint
         args = parse_shell_argument(arg, command_name='history')
         history = self._trader.history_orders()
 
@@ -734,7 +808,6 @@ class TraderShell(Cmd):
             return
 
         for argument in args:
-            from qteasy.utilfuncs import is_complete_cn_stock_symbol_like, is_cn_stock_symbol_like
             if is_complete_cn_stock_symbol_like(argument.upper()):
                 history = history[history['symbol'] == argument.upper()]
                 # select orders by order symbol arguments like '000001'
@@ -823,12 +896,10 @@ class TraderShell(Cmd):
         - display all filled orders of stock 000001 executed today
         """
 
-        from rich import print as rprint
         args = parse_shell_argument(arg, default='--today', command_name='orders')
         order_details = self._trader.history_orders()
 
         for argument in args:
-            from qteasy.utilfuncs import is_complete_cn_stock_symbol_like, is_cn_stock_symbol_like
             # select orders by time range arguments like 'last_hour', 'today', '3day', 'week', 'month'
             if argument in ['--last_hour', '-l', '-h', '--today', '-t', '--yesterday', '-y',
                             '--3day', '-3', '--week', '-w', '--month', '-m']:
@@ -947,7 +1018,6 @@ class TraderShell(Cmd):
         """
 
         args = parse_shell_argument(arg, command_name='change')
-        from qteasy.utilfuncs import is_complete_cn_stock_symbol_like, is_cn_stock_symbol_like, is_number_like
 
         if not args:
             print('Please input valid arguments.')
@@ -1005,7 +1075,6 @@ class TraderShell(Cmd):
             current_price = last_available_data['close'][symbol][-1]
         except Exception as e:
             print(f'Error: {e}, latest available data can not be downloaded. 10.00 will be used as current price.')
-            import traceback
             traceback.print_exc()
             current_price = 10.00
         if len(args) == 2:
@@ -1050,7 +1119,6 @@ class TraderShell(Cmd):
             print('dashboard command does not accept arguments.')
             return False
         if not self.trader.debug:
-            import os
             # check os type of current system, and then clear screen
             os.system('cls' if os.name == 'nt' else 'clear')
         self._status = 'dashboard'
@@ -1097,7 +1165,6 @@ class TraderShell(Cmd):
             except Exception as e:
                 print(f'Invalid parameter ({",".join(pars)})! Error: {e}')
                 if self.trader.debug:
-                    import traceback
                     traceback.print_exc()
                 return
             if not isinstance(new_pars, tuple):
@@ -1111,7 +1178,6 @@ class TraderShell(Cmd):
                 print(f'Can not set {new_pars} to {strategy_id}, Error: {e}')
                 self.trader.operator.info()
                 if self.trader.debug:
-                    import traceback
                     traceback.print_exc()
                 return
             print(f'Parameter {new_pars} has been set to strategy {strategy_id}.')
@@ -1169,11 +1235,9 @@ class TraderShell(Cmd):
             try:
                 self.trader.run_task('run_strategy', argument)
             except Exception as e:
-                import traceback
                 print(f'Error in running strategy: {e}')
                 print(traceback.format_exc())
 
-            import time
             time.sleep(20)
             self.trader.status = current_trader_status
             self.trader.broker.status = current_broker_status
@@ -1185,7 +1249,6 @@ class TraderShell(Cmd):
             try:
                 self.trader.run_task(task_name)
             except Exception as e:
-                import traceback
                 print(f'Error in running task: {e}')
                 print(traceback.format_exc())
 
@@ -1203,14 +1266,14 @@ class TraderShell(Cmd):
         return line
 
     def run(self):
-        from threading import Thread
 
         self.do_dashboard('')
         Thread(target=self.trader.run).start()
         Thread(target=self.trader.broker.run).start()
 
         prev_message = ''
-        live_price_refresh_timer = 0
+        message_queue = self._trader.message_queue
+        last_price_refresh_time = time.time()
         while True:
             # enter shell loop
             try:
@@ -1221,18 +1284,24 @@ class TraderShell(Cmd):
                     # check trader message queue and display messages
                     watched_price_refresh_interval = self.trader.get_config(
                             'watched_price_refresh_interval')['watched_price_refresh_interval']
-                    if not self._trader.message_queue.empty():
+                    # 阻塞等待下一条消息，最多等待SHELL_MESSAGE_WAIT_TIMEOUT秒，没有消息时不占用CPU，新消息到达时立即显示
+                    try:
+                        message = message_queue.get(timeout=SHELL_MESSAGE_WAIT_TIMEOUT)
+                    except Empty:
+                        message = None
+                    # 每次循环都显示消息队列中所有待显示的消息，避免消息较多时积压在队列中
+                    while message is not None:
                         text_width = int(shutil.get_terminal_size().columns)
                         # adjust message length
-                        message = self._trader.message_queue.get()
                         if message[-2:] == '_R':
                             # 如果读取到覆盖型信息，则逐次读取所有的覆盖型信息，并显示最后一条和下一条常规信息
                             next_normal_message = None
                             while True:
-                                if self._trader.message_queue.empty():
+                                try:
+                                    next_message = message_queue.get_nowait()
+                                except Empty:
                                     break
-                                next_message = self._trader.message_queue.get()
-                                if message[-2:] != '_R':
+                                if next_message[-2:] != '_R':
                                     next_normal_message = next_message
                                     break
                                 message = next_message
@@ -1246,6 +1315,11 @@ class TraderShell(Cmd):
                             rprint(message, end='\r')
                             if next_normal_message:
                                 rprint(message)
+                                message = adjust_string_length(next_normal_message,
+                                                               text_width - 2,
+                                                               hans_aware=True,
+                                                               format_tags=True)
+                                rprint(message)
                         else:
                             # 在前一条信息为覆盖型信息时，在信息前插入"\n"使常规信息在下一行显示
                             if prev_message[-2:] == '_R':
@@ -1256,22 +1330,23 @@ class TraderShell(Cmd):
                                                            format_tags=True)
                             rprint(message)
                         prev_message = message
+                        try:
+                            message = message_queue.get_nowait()
+                        except Empty:
+                            message = None
                     # check if live price refresh timer is up, if yes, refresh live prices
-                    live_price_refresh_timer += 0.05
-                    if live_price_refresh_timer > watched_price_refresh_interval:
+                    if time.time() - last_price_refresh_time > watched_price_refresh_interval:
                         # 在一个新的进程中读取实时价格, 收盘后不获取
                         if self.trader.is_market_open:
-                            from threading import Thread
                             t = Thread(target=self.update_watched_prices, daemon=True)
                             t.start()
                             if self.trader.debug:
                                 self.trader.post_message(f'Acquiring watched prices in a new thread<{t.name}>')
-                        live_price_refresh_timer = 0
+                        last_price_refresh_time = time.time()
                 elif self.status == 'command':
                     # get user command input and do commands
                     sys.stdout.write('will enter interactive mode.\n')
                     if not self.trader.debug:
-                        import os
                         # check os type of current system, and then clear screen
                         os.system('cls' if os.name == 'nt' else 'clear')
                     # check if data source is connected here, if not, reconnect before entering interactive mode
@@ -1281,7 +1356,7 @@ class TraderShell(Cmd):
                 else:
                     sys.stdout.write('status error, shell will exit, trader and broker will be shut down\n')
                     self.do_bye('')
-                time.sleep(0.05)
+                    time.sleep(SHELL_MESSAGE_WAIT_TIMEOUT)
             except KeyboardInterrupt:
                 # ask user if he/she wants to: [1], command mode; [2], stop trader; [3 or other], resume dashboard mode
                 t = Timer(5, lambda: print(
@@ -1305,7 +1380,6 @@ class TraderShell(Cmd):
             # looks like finally block is better than except block here
             except Exception as e:
                 self.stdout.write(f'Unexpected Error: {e}\n')
-                import traceback
                 traceback.print_exc()
                 self.do_bye('')
 
@@ -1320,7 +1394,8 @@ class Trader(object):
         一个task_daily_scheduler，它每天生成一个task列表和计划时间，在计划时间将任务加入task队列，任何需要
             执行的任务都需要被添加到队列中才会执行，执行完成后从队列中删除。
             Trader的main loop定期检查task_queue中的任务，如果有任务到达，就执行任务，否则等待下一个任务到达。
-            如果在交易日中，Trader会定时将task_daily_agenda中的任务添加到task_queue中。
+            如果在交易日中，Trader会定时将task_daily_agenda中已经到时间的任务添加到agenda队列中，
+            main loop优先执行task_queue中的任务，其次执行agenda队列中的任务。
             如果不是交易日，Trader会打印当前状态，并等待下一个交易日。
         一个task_runner, 启动一个新的线程，运行指定的任务，等待任务返回结果
 
@@ -1330,8 +1405,8 @@ class Trader(object):
         账户ID
     broker: Broker
         交易所对象，接受交易订单并返回交易结果
-    task_queue: list of tuples
-        任务队列，每个任务是一个tuple，包含任务的执行时间和任务的名称
+    task_queue: Queue
+        任务队列，用于接收外部添加的任务，每个任务是任务的名称或包含任务名称和参数的tuple
     task_daily_schedule: list of tuples
         每天的任务日程，每个任务是一个tuple，包含任务的执行时间和任务的名称
     operator: Operator
@@ -1407,8 +1482,11 @@ class Trader(object):
         self._asset_pool = asset_pool
         self._asset_type = asset_type
 
-        self.task_queue = Queue()
-        self.message_queue = Queue()
+        # 任务队列和信息队列不需要task_done()和join()，使用C实现的SimpleQueue，put和get的开销远小于Queue
+        self.task_queue = SimpleQueue()
+        self._agenda_queue = deque()  # 已经到时间的日程任务，只由Trader的主循环添加和读取，不需要加锁
+        self.message_queue = SimpleQueue()
+        self._result_forwarder = None  # 转发broker交易结果的线程
 
         self.task_daily_schedule = []
         self.time_zone = config['time_zone']
@@ -1425,6 +1503,17 @@ class Trader(object):
 
         self.account = get_account(self.account_id, data_source=self._datasource)
 
+        # 账户现金和持仓的缓存，只有在账户或持仓发生变化后才重新从数据源读取
+        self._cached_cash = None
+        self._cached_positions = None
+        self._cash_dirty = True
+        self._positions_dirty = True
+        # 历史订单的缓存，key为with_trade_results，只有在订单发生变化后才重新从数据源读取
+        self._cached_history_orders = {}
+        self._orders_dirty = True
+        # 每个实时数据表最近一次下载实时数据时所在的日程时刻（精确到分钟），同一时刻运行的多组策略只需要下载一次
+        self._live_data_fetched_ticks = {}
+
         self.debug = debug
 
     # ================== properties ==================
@@ -1473,7 +1562,15 @@ class Trader(object):
              total_invest: float, 账户的总投资额
             )
         """
-        return get_account_cash_availabilities(self.account_id, data_source=self._datasource)
+        if self._cash_dirty:
+            # 先清除标记再读取，读取过程中如果账户再次变化，下次访问时会重新读取
+            self._cash_dirty = False
+            try:
+                self._cached_cash = get_account_cash_availabilities(self.account_id, data_source=self._datasource)
+            except Exception:
+                self._cash_dirty = True
+                raise
+        return self._cached_cash
 
     @property
     def account_positions(self):
@@ -1484,19 +1581,39 @@ class Trader(object):
         positions: DataFrame, columns=['symbol', 'qty', 'available_qty'， 'cost']
             account持仓的symbol，qty, available_qty和cost, symbol与shares的顺序一致
         """
+        if self._positions_dirty:
+            # 先清除标记再读取，读取过程中如果持仓再次变化，下次访问时会重新读取
+            self._positions_dirty = False
+            try:
+                self._cached_positions = self._read_account_positions()
+            except Exception:
+                self._positions_dirty = True
+                raise
+        # 返回副本，避免调用者修改缓存的持仓数据
+        return self._cached_positions.copy()
+
+    def _read_account_positions(self):
+        """ 从数据源读取账户的持仓，并添加每个symbol的名称 """
         shares = self.asset_pool
 
         positions = get_account_position_details(
                 self.account_id,
                 shares=shares,
-                data_source=self._datasource
+                data_source=self._datasource,
+                orient='index',
         )
         # 获取每个symbol的names
-        positions = positions.T
         symbol_names = get_symbol_names(datasource=self._datasource, symbols=positions.index.tolist())
         positions['name'] = [adjust_string_length(name, 8, hans_aware=True, padding='left') for name in symbol_names]
         return positions
 
+    def _invalidate_account_cache(self):
+        """ 账户现金、持仓或订单发生变化后调用，下次访问account_cash、account_positions或history_orders时
+        重新从数据源读取 """
+        self._cash_dirty = True
+        self._positions_dirty = True
+        self._orders_dirty = True
+
     @property
     def non_zero_positions(self):
         """ 账户当前的持仓，一个tuple，当前持有非零的股票仓位symbol，持有数量和可用数量 """
@@ -1543,8 +1660,10 @@ class Trader(object):
         """ 根据当前时区获取当前时间，如果指定时区等于当前时区，将当前时区设置为local，返回当前时间"""
 
         tz_time = get_current_tz_datetime(self.time_zone)
+        if self.time_zone == 'local':
+            return tz_time
         # if tz_time is very close to local time, then set time_zone to local and return local time
-        if abs(tz_time - pd.to_datetime('today')) < pd.Timedelta(seconds=1):
+        if abs(tz_time.to_pydatetime() - dt.datetime.now()) < LOCAL_TIME_ZONE_TOLERANCE:
             self.time_zone = 'local'
         # else return tz_time
         return tz_time
@@ -1572,7 +1691,6 @@ class Trader(object):
                 columns=['datetime', 'task', 'parameters'],
         )
         schedule.set_index(keys='datetime', inplace=True)
-        from rich import print as rprint
         schedule_string = schedule.to_string()
         schedule_string = schedule_string.replace('[', '<')
         schedule_string = schedule_string.replace(']', '>')
@@ -1586,11 +1704,15 @@ class Trader(object):
     def run(self):
         """ 交易系统的main loop：
 
-        1，检查task_queue中是否有任务，如果有任务，则提取任务，根据当前status确定是否执行任务，如果可以执行，则执行任务，否则忽略任务
-        2，如果当前是交易日，检查当前时间是否在task_daily_agenda中，如果在，则将任务添加到task_queue中
-        3，如果当前是交易日，检查broker的result_queue中是否有交易结果，如果有，则添加"process_result"任务到task_queue中
+        1，检查task_queue和agenda队列中是否有任务，如果有任务，则提取任务，根据当前status确定是否执行任务，如果可以执行，则执行任务，否则忽略任务
+        2，如果当前是交易日，检查当前时间是否在task_daily_agenda中，如果在，则将任务添加到agenda队列中
+        3，broker的交易结果由独立的线程转发，交易结果到达时立即添加"process_result_batch"任务到task_queue中
         """
         self.status = 'sleeping'
+        # 启动转发交易结果的线程，如果前一次运行的线程仍在运行，则不需要重复启动
+        if (self._result_forwarder is None) or (not self._result_forwarder.is_alive()):
+            self._result_forwarder = Thread(target=self._forward_broker_results, daemon=True)
+            self._result_forwarder.start()
         self._check_trade_day()
         self._initialize_schedule()
         self.post_message(f'Trader is running with account_id: {self.account_id}\n'
@@ -1598,36 +1720,51 @@ class Trader(object):
                           f'{self.get_current_tz_datetime().strftime("%Y-%m-%d %H:%M:%S")}\n'
                           f'current day is trade day: {self.is_trade_day}\n'
                           f'running agenda: {self.task_daily_schedule}')
-        market_open_day_loop_interval = 0.05
-        market_close_day_loop_interval = 1
+        # 新任务和交易结果到达时会立即唤醒循环，日程任务则按照到下一个任务的倒计时等待，因此循环间隔只决定
+        # 日期变化检查和broker消息转发的最大延迟，交易日与非交易日可以使用相同的循环间隔
+        loop_interval = 1
+        sleep_interval = loop_interval
         current_date_time = self.get_current_tz_datetime()  # 产生当地时间
         current_date = current_date_time.date()
+        # 循环中反复使用的对象在循环开始前绑定为局部变量，减少每次循环中的属性查找
+        task_queue = self.task_queue
+        agenda_queue = self._agenda_queue
+        broker_messages = self.broker.broker_messages
+        task_whitelist = self.TASK_WHITELIST
+        post_message = self.post_message
         try:
             while self.status != 'stopped':
                 pre_date = current_date
-                sleep_interval = market_close_day_loop_interval if not \
-                    self.is_trade_day else \
-                    market_open_day_loop_interval
-                # 检查任务队列，如果有任务，执行任务，否则添加任务到任务队列
-                if not self.task_queue.empty():
+                # 检查任务队列，优先执行外部添加到task_queue中的任务，其次执行agenda队列中已到时间的日程任务
+                # 两个队列都为空时最多等待sleep_interval秒（不超过到下一个日程任务的倒计时），等待期间新任务到达时
+                # 立即取出执行，不需要等到下一个循环
+                try:
+                    task = task_queue.get_nowait()
+                except Empty:
+                    if agenda_queue:
+                        task = agenda_queue.popleft()
+                    else:
+                        try:
+                            task = task_queue.get(timeout=sleep_interval)
+                        except Empty:
+                            task = None
+                if task is not None:
                     # 如果任务队列不为空，执行任务
-                    white_listed_tasks = self.TASK_WHITELIST[self.status]
-                    task = self.task_queue.get()
+                    white_listed_tasks = task_whitelist[self.status]
                     if isinstance(task, tuple):
                         if self.debug:
-                            self.post_message(f'tuple task: {task} is taken from task queue, task[0]: {task[0]}'
-                                              f'task[1]: {task[1]}')
+                            post_message(f'tuple task: {task} is taken from task queue, task[0]: {task[0]}'
+                                         f'task[1]: {task[1]}')
                         task_name = task[0]
                         args = task[1]
                     else:
                         task_name = task
                         args = None
                     if self.debug:
-                        self.post_message(f'task queue is not empty, taking next task from queue: {task_name}')
+                        post_message(f'task queue is not empty, taking next task from queue: {task_name}')
                     if task_name not in white_listed_tasks:
                         if self.debug:
-                            self.post_message(f'task: {task} cannot be executed in current status: {self.status}')
-                        self.task_queue.task_done()
+                            post_message(f'task: {task} cannot be executed in current status: {self.status}')
                         continue
                     try:
                         if args:
@@ -1635,37 +1772,32 @@ class Trader(object):
                         else:
                             self.run_task(task_name)
                     except Exception as e:
-                        self.post_message(f'error occurred when executing task: {task_name}, error: {e}')
+                        post_message(f'error occurred when executing task: {task_name}, error: {e}')
                         if self.debug:
-                            import traceback
                             traceback.print_exc()
-                    self.task_queue.task_done()
 
                 # 如果没有暂停，从任务日程中添加任务到任务队列
                 current_date_time = self.get_current_tz_datetime()  # 产生本地时间
                 current_time = current_date_time.time()
                 current_date = current_date_time.date()
+                sleep_interval = loop_interval
                 if self.status != 'paused':
-                    self._add_task_from_agenda(current_time)
+                    count_down = self._add_task_from_agenda(current_time)
+                    # 下一个日程任务到时间时立即唤醒循环，不需要等待完整的循环间隔
+                    if (count_down is not None) and (count_down < sleep_interval):
+                        sleep_interval = count_down
                 # 如果日期变化，检查是否是交易日，如果是交易日，更新日程
                 # TODO: move these operations to a task "change_date"
                 if current_date != pre_date:
                     self._check_trade_day()
                     self._initialize_schedule(current_time)
+                    sleep_interval = 0
 
-                # 检查broker的result_queue中是否有交易结果，如果有，则添加"process_result"任务到task_queue中
-                if not self.broker.result_queue.empty():
-                    result = self.broker.result_queue.get()
-                    self.post_message(f'got new result from broker for order {result["order_id"]}, '
-                                      f'adding process_result task to queue')
-                    self.add_task('process_result', result)
-                # 检查broker的message_queue中是否有消息，如果有，则处理消息，通常情况将消息添加到消息队列中
-                if not self.broker.broker_messages.empty():
-                    message = self.broker.broker_messages.get()
-                    self.post_message(message)
-                    self.broker.broker_messages.task_done()
-
-                time.sleep(sleep_interval)
+                # 检查broker的message_queue中是否有消息，如果有，则处理所有消息，通常情况将消息添加到消息队列中
+                while not broker_messages.empty():
+                    message = broker_messages.get()
+                    post_message(message)
+                    broker_messages.task_done()
             else:
                 # process trader when trader is normally stopped
                 self.post_message('Trader completed and exited.')
@@ -1675,10 +1807,30 @@ class Trader(object):
         except Exception as e:
             self.post_message(f'error occurred when running trader, error: {e}')
             if self.debug:
-                import traceback
                 traceback.print_exc()
         return
 
+    def _forward_broker_results(self):
+        """ 等待broker的交易结果，结果到达后取出已有的结果（每批最多BROKER_RESULT_BATCH_SIZE个），作为一个
+        "process_result_batch"任务添加到task_queue中
+
+        在独立的线程中运行，直到Trader停止。Trader的主循环阻塞等待task_queue，因此交易结果到达后主循环
+        会立即被唤醒并处理结果，不需要等待下一次循环时再检查result_queue
+        """
+        broker_result_queue = self.broker.result_queue
+        while self.status != 'stopped':
+            try:
+                result = broker_result_queue.get(timeout=BROKER_RESULT_WAIT_TIMEOUT)
+            except Empty:
+                continue
+            results = [result]
+            while (len(results) < BROKER_RESULT_BATCH_SIZE) and (not broker_result_queue.empty()):
+                results.append(broker_result_queue.get())
+            self.post_message(f'got {len(results)} new results from broker for orders '
+                              f'{[result["order_id"] for result in results]}, '
+                              f'adding process_result_batch task to queue')
+            self._add_task_to_queue(('process_result_batch', results))
+
     def info(self, width=80):
         """ 打印账户的概览，包括账户基本信息，持有现金和持仓信息
 
@@ -1692,7 +1844,6 @@ class Trader(object):
         None
         """
 
-        from rich import print as rprint
 
         semi_width = int(width * 0.65)
         position_info = self.account_position_info
@@ -1771,8 +1922,6 @@ class Trader(object):
         trade_results: DataFrame
             交易结果
         """
-        from qteasy.trade_recording import read_trade_results_by_order_id
-        from qteasy.trade_recording import query_trade_orders
         trade_orders = query_trade_orders(
                 self.account_id,
                 status=status,
@@ -1866,27 +2015,48 @@ class Trader(object):
             - execution_time: datetime, 成交时间
             - delivery_status: str, 交割状态，D/ND
         """
-        from qteasy.trade_recording import query_trade_orders, get_account_positions, read_trade_results_by_order_id
+        if self._orders_dirty:
+            # 订单变化后清空缓存，重新从数据源读取
+            self._orders_dirty = False
+            self._cached_history_orders = {}
+        with_trade_results = bool(with_trade_results)
+        if with_trade_results not in self._cached_history_orders:
+            try:
+                self._cached_history_orders[with_trade_results] = self._read_history_orders(with_trade_results)
+            except Exception:
+                self._orders_dirty = True
+                raise
+        # 返回副本，避免调用者修改缓存的订单数据
+        return self._cached_history_orders[with_trade_results].copy()
+
+    def _read_history_orders(self, with_trade_results):
+        """ 从数据源读取账户的历史订单，按订单的pos_id查找持仓的symbol和position，直接按列顺序生成DataFrame """
         orders = query_trade_orders(self.account_id, data_source=self._datasource)
         positions = get_account_positions(self.account_id, data_source=self._datasource)
-        order_details = orders.join(positions, on='pos_id', rsuffix='_p')
-        order_details.drop(columns=['pos_id', 'account_id', 'qty_p', 'available_qty'], inplace=True)
-        order_details = order_details.reindex(
-                columns=['symbol', 'position', 'direction', 'order_type',
-                         'qty', 'price',
-                         'submitted_time', 'status']
+        # 持仓数量远少于订单数量，用map按pos_id查找比join更快，且不需要复制不需要的持仓列
+        pos_ids = orders['pos_id']
+        order_details = pd.DataFrame(
+                {
+                    'symbol':         pos_ids.map(positions['symbol']),
+                    'position':       pos_ids.map(positions['position']),
+                    'direction':      orders['direction'],
+                    'order_type':     orders['order_type'],
+                    'qty':            orders['qty'],
+                    'price':          orders['price'],
+                    'submitted_time': orders['submitted_time'],
+                    'status':         orders['status'],
+                },
         )
         if not with_trade_results:
             return order_details
         results = read_trade_results_by_order_id(orders.index.to_list(), data_source=self._datasource)
         order_result_details = order_details.join(results.set_index('order_id'), lsuffix='_quoted', rsuffix='_filled')
-        order_result_details = order_result_details.reindex(
+        return order_result_details.reindex(
                 columns=['symbol', 'position', 'direction', 'order_type',
                          'qty', 'price_quoted', 'submitted_time', 'status',
                          'price_filled', 'filled_qty', 'canceled_qty', 'transaction_fee', 'execution_time',
                          'delivery_status'],
         )
-        return order_result_details
 
     # ============ definition of tasks ================
     def _start(self):
@@ -1943,46 +2113,47 @@ class Trader(object):
         operator = self._operator
         signal_type = operator.signal_type
         shares = self.asset_pool
-        own_amounts = self.account_positions['qty']
-        available_amounts = self.account_positions['available_qty']
-        own_cash = self.account_cash[0]
-        available_cash = self.account_cash[1]
+        account_positions = self.account_positions
+        own_amounts = account_positions['qty']
+        available_amounts = account_positions['available_qty']
+        own_cash, available_cash = self.account_cash[:2]
         config = self._config
         # window_length = self._operator.max_window_length
         #
         # # 下载最小所需实时历史数据
         # data_end_time = self.get_current_tz_datetime()  # 产生本地时间
-        max_strategy_freq = 'T'
-        for strategy_id in strategy_ids:
-            strategy = operator[strategy_id]
-            freq = strategy.strategy_run_freq.upper()
-            if TIME_FREQ_LEVELS[freq] < TIME_FREQ_LEVELS[max_strategy_freq]:
-                max_strategy_freq = freq
+        run_freqs = tuple(operator[strategy_id].strategy_run_freq.upper() for strategy_id in strategy_ids)
         # 解析strategy_run的运行频率，根据频率确定是否下载实时数据
         if self.debug:
             self.post_message(f'getting live price data for strategy run...')
-        # # 将类似于'2H'或'15min'的时间频率转化为两个变量：duration和unit (duration=2, unit='H')/ (duration=15, unit='min')
-        duration, unit, _ = parse_freq_string(max_strategy_freq, std_freq_only=False)
+        max_strategy_freq, duration, unit = _parse_strategy_run_freqs(run_freqs)
         if (unit.lower() in ['min', '5min', '10min', '15min', '30min', 'h']) and self.is_trade_day:
             # 如果strategy_run的运行频率为分钟或小时，则调用fetch_realtime_price_data方法获取分钟级别的实时数据
             table_to_update = UNIT_TO_TABLE[unit.lower()]
-            real_time_data = self._datasource.fetch_realtime_price_data(
-                    table=table_to_update,
-                    channel=config['live_price_acquire_channel'],
-                    symbols=self.asset_pool,
-            )
+            # 同一日程时刻运行的多组策略只需要下载一次实时数据，不同时刻运行的策略即使处于同一个bar中也需要重新下载
+            current_time = self.get_current_tz_datetime()
+            if self._is_live_data_fetched(table_to_update, current_time):
+                if self.debug:
+                    self.post_message(f'live data of {table_to_update} already fetched at {current_time}')
+            else:
+                real_time_data = self._datasource.fetch_realtime_price_data(
+                        table=table_to_update,
+                        channel=config['live_price_acquire_channel'],
+                        symbols=self.asset_pool,
+                )
 
-            # 将real_time_data写入DataSource
-            # 在real_time_data中数据的trade_time列中增加日期并写入DataSource，但是只在交易日这么做，否则会出现日期错误
-            real_time_data['trade_time'] = real_time_data['trade_time'].apply(
-                    lambda x: pd.to_datetime(x)
-            )
-            # 将实时数据写入数据库 (仅在交易日这么做)
-            rows_written = self._datasource.update_table_data(
-                    table=table_to_update,
-                    df=real_time_data,
-                    merge_type='update',
-            )
+                # 将real_time_data写入DataSource
+                # 在real_time_data中数据的trade_time列中增加日期并写入DataSource，但是只在交易日这么做，否则会出现日期错误
+                real_time_data['trade_time'] = real_time_data['trade_time'].apply(
+                        lambda x: pd.to_datetime(x)
+                )
+                # 将实时数据写入数据库 (仅在交易日这么做)
+                rows_written = self._datasource.update_table_data(
+                        table=table_to_update,
+                        df=real_time_data,
+                        merge_type='update',
+                )
+                self._mark_live_data_fetched(table_to_update, current_time)
 
         # 如果strategy_run的运行频率大于等于D，则不下载实时数据，使用datasource中的历史数据
         else:
@@ -2006,11 +2177,13 @@ class Trader(object):
         )
 
         # 生成N行5列的交易相关数据，包括当前持仓、可用持仓、当前价格、最近成交量、最近成交价格
-        trade_data = np.zeros(shape=(len(shares), 5))
+        # 持仓表只读取一次，同时用于计算可用持仓和最近成交汇总
+        all_positions = get_account_positions(account_id=self.account_id, data_source=self._datasource)
         position_availabilities = get_account_position_availabilities(
                 account_id=self.account_id,
                 shares=shares,
                 data_source=self._datasource,
+                positions=all_positions,
         )
         # 当前价格是hist_op的最后一行, 如果需要用latest_data_cycle，最新的实时数据已经包含在hist_op中了
         timing_type = operator[strategy_ids[0]].strategy_timing
@@ -2021,14 +2194,17 @@ class Trader(object):
                 account_id=self.account_id,
                 shares=shares,
                 data_source=self._datasource,
+                positions=all_positions,
         )
         if self.debug:
             self.post_message(f'Generating trade data from position availabilities...')
-        trade_data[:, 0] = position_availabilities[1]
-        trade_data[:, 1] = position_availabilities[2]
-        trade_data[:, 2] = current_prices
-        trade_data[:, 3] = last_trade_result_summary[1]
-        trade_data[:, 4] = last_trade_result_summary[2]
+        trade_data = np.column_stack(
+                [position_availabilities[1],
+                 position_availabilities[2],
+                 current_prices,
+                 last_trade_result_summary[1],
+                 last_trade_result_summary[2]]
+        ).astype('float', copy=False)
 
         if operator.op_type == 'batch':
             raise KeyError(f'Operator can not work in live mode when its operation type is "batch", set '
@@ -2063,16 +2239,20 @@ class Trader(object):
                               f'directions: {directions}\n'
                               f'quantities: {quantities}\n'
                               f'current_prices: {quoted_prices}\n')
-        for sym, name, pos, d, qty, price in zip(symbols, names, positions, directions, quantities, quoted_prices):
-            if qty <= 0.001:
-                continue
-            pos_id = get_or_create_position(account_id=self.account_id,
-                                            symbol=sym,
-                                            position_type=pos,
-                                            data_source=self._datasource)
-
-            # 生成交易订单dict
-            trade_order = {
+        # 忽略数量过小的交易信号，其余的交易订单一次性写入数据库
+        order_elements = [
+            (sym, name, pos, d, qty, price) for sym, name, pos, d, qty, price in
+            zip(symbols, names, positions, directions, quantities, quoted_prices) if qty > 0.001
+        ]
+        pos_ids = get_or_create_positions(
+                account_id=self.account_id,
+                symbols=[elements[0] for elements in order_elements],
+                position_types=[elements[2] for elements in order_elements],
+                data_source=self._datasource,
+        )
+        # 生成交易订单dict
+        trade_orders = [
+            {
                 'pos_id':         pos_id,
                 'direction':      d,
                 'order_type':     'market',  # TODO: order type is to be properly defined
@@ -2080,11 +2260,14 @@ class Trader(object):
                 'price':          price,
                 'submitted_time': None,
                 'status':         'created',
-            }
-
-            order_id = record_trade_order(trade_order, data_source=self._datasource)
-            # 逐一提交交易信号
-            if submit_order(order_id=order_id, data_source=self._datasource) is not None:
+            } for pos_id, (sym, name, pos, d, qty, price) in zip(pos_ids, order_elements)
+        ]
+        order_ids = record_trade_orders(trade_orders, data_source=self._datasource)
+        # 一次性提交所有交易信号，再逐一发送到broker
+        submitted_ids = submit_orders(order_ids=order_ids, data_source=self._datasource)
+        for order_id, submitted_id, trade_order, (sym, name, pos, d, qty, price) in zip(
+                order_ids, submitted_ids, trade_orders, order_elements):
+            if submitted_id is not None:
                 trade_order['order_id'] = order_id
                 self._broker.order_queue.put(trade_order)
                 # format the message depending on buy/sell orders
@@ -2097,48 +2280,81 @@ class Trader(object):
                 # 记录已提交的交易数量
                 submitted_qty += 1
 
+        if submitted_qty > 0:
+            self._invalidate_account_cache()
         self.post_message(f'[RAN STRATEGY {strategy_ids}]: {submitted_qty} orders submitted in total.')
 
         return submitted_qty
 
+    def _is_live_data_fetched(self, table, current_time):
+        """ 判断实时数据表table在current_time所在的日程时刻（精确到分钟）是否已经下载过实时数据
+
+        Parameters
+        ----------
+        table: str
+            实时数据表的名称
+        current_time: pd.Timestamp
+            当前时间
+
+        Returns
+        -------
+        bool
+        """
+        return self._live_data_fetched_ticks.get(table) == current_time.floor(LIVE_DATA_FETCH_TICK)
+
+    def _mark_live_data_fetched(self, table, current_time):
+        """ 记录实时数据表table在current_time所在的日程时刻已经下载过实时数据 """
+        self._live_data_fetched_ticks[table] = current_time.floor(LIVE_DATA_FETCH_TICK)
+
     def _process_result(self, result):
-        """ 从result_queue中读取并处理交易结果
+        """ 处理一条交易结果，处理过程与_process_result_batch()相同 """
+        self._process_result_batch([result])
+
+    def _process_result_batch(self, results):
+        """ 处理从result_queue中一次读取的所有交易结果
 
-        1，处理交易结果，更新账户和持仓信息
-        2，处理交易结果的交割，记录交割结果（未达到交割条件的交易结果不会被处理）
+        1，逐一处理交易结果，更新账户和持仓信息
+        2，所有交易结果处理完成后，处理一次交易结果的交割，记录交割结果（未达到交割条件的交易结果不会被处理）
         4，生成交易结果信息推送到信息队列
+
+        Parameters
+        ----------
+        results: list of dict
+            交易结果列表
         """
         if self.debug:
-            self.post_message('running task process_result')
-        if self.debug:
-            self.post_message(f'process_result: got result: \n{result}')
-        # 交易结果处理, 更新账户和持仓信息, 如果交易结果导致错误，不会更新账户和持仓信息
-        try:
-            result_id = process_trade_result(result, data_source=self._datasource)
-        except Exception as e:
-            self.post_message(f'{e} Error occurred during processing trade result, result will be ignored')
+            self.post_message(f'running task process_result with {len(results)} results')
+        for result in results:
             if self.debug:
-                import traceback
-                traceback.print_exc()
-            return
-        if result_id is not None:
-            from qteasy.trade_recording import read_trade_result_by_id, read_trade_order_detail
-            result_detail = read_trade_result_by_id(result_id, data_source=self._datasource)
-            order_id = result_detail['order_id']
-            order_detail = read_trade_order_detail(order_id, data_source=self._datasource)
-            pos, d, sym = order_detail['position'], order_detail['direction'], order_detail['symbol']
-            status = order_detail['status']
-            filled_qty, filled_price = result_detail['filled_qty'], result_detail['price']
-            self.post_message(f'[ORDER EXECUTED {order_id}]: '
-                              f'{d}-{pos} of {sym}: {status} with {filled_qty} @ {filled_price}')
-        # self.post_message(f'processed trade result: {result_id}\n{result}')
-        if self.debug:
-            self.post_message(f'processed trade result: {result_id}\n{result}')
+                self.post_message(f'process_result: got result: \n{result}')
+            # 交易结果处理, 更新账户和持仓信息, 如果交易结果导致错误，不会更新账户和持仓信息
+            try:
+                result_id = process_trade_result(result, data_source=self._datasource)
+            except Exception as e:
+                self.post_message(f'{e} Error occurred during processing trade result, result will be ignored')
+                if self.debug:
+                    traceback.print_exc()
+                continue
+            finally:
+                self._invalidate_account_cache()
+            if result_id is not None:
+                result_detail = read_trade_result_by_id(result_id, data_source=self._datasource)
+                order_id = result_detail['order_id']
+                order_detail = read_trade_order_detail(order_id, data_source=self._datasource)
+                pos, d, sym = order_detail['position'], order_detail['direction'], order_detail['symbol']
+                status = order_detail['status']
+                filled_qty, filled_price = result_detail['filled_qty'], result_detail['price']
+                self.post_message(f'[ORDER EXECUTED {order_id}]: '
+                                  f'{d}-{pos} of {sym}: {status} with {filled_qty} @ {filled_price}')
+            if self.debug:
+                self.post_message(f'processed trade result: {result_id}\n{result}')
+        # 所有交易结果都处理完成后再统一处理交割
         process_trade_delivery(
                 account_id=self.account_id,
                 data_source=self._datasource,
                 config=self._config,
         )
+        self._invalidate_account_cache()
         if self.debug:
             self.post_message(f'processed trade delivery: cashes \n{self.account_cash}')
             self.post_message(f'processed trade delivery: positions \n{self.non_zero_positions}')
@@ -2155,6 +2371,8 @@ class Trader(object):
         datasource.get_all_basic_table_data(
                 refresh_cache=True,
         )
+        # 基础数据刷新后持仓中的股票名称可能变化，重新读取账户信息
+        self._invalidate_account_cache()
         self.post_message(f'data source reconnected...')
 
         # 扫描数据源，下载缺失的日频或以上数据
@@ -2191,31 +2409,32 @@ class Trader(object):
         #   result_queue中的结果全部处理完毕，或者超过一定时间
         if not order_queue.empty():
             self.post_message('unprocessed orders found, these orders will be canceled')
-            while not order_queue.empty():
-                order = order_queue.get()
-                order_id = order['order_id']
-                cancel_order(order_id, data_source=self._datasource)  # 生成订单取消记录，并记录到数据库
-                self.post_message(f'canceled unprocessed order: {order_id}')
+            # 先一次取出所有未处理的订单，再一次性生成所有订单的取消记录，并记录到数据库
+            unprocessed_ids = []
+            while True:
+                try:
+                    order = order_queue.get_nowait()
+                except Empty:
+                    break
+                unprocessed_ids.append(order['order_id'])
                 order_queue.task_done()
+            cancel_orders(order_ids=unprocessed_ids, data_source=self._datasource)
+            for order_id in unprocessed_ids:
+                self.post_message(f'canceled unprocessed order: {order_id}')
         # 检查今日成交订单，确认是否有"部分成交"以及"未成交"的订单，如果有，生成取消订单，取消尚未成交的部分
-        partially_filled_orders = query_trade_orders(
+        orders_to_be_canceled = query_trade_orders(
                 account_id=self.account_id,
-                status='partial-filled',
+                status=['partial-filled', 'submitted'],
                 data_source=self._datasource,
         )
-        unfilled_orders = query_trade_orders(
-                account_id=self.account_id,
-                status='submitted',
-                data_source=self._datasource,
-        )
-        orders_to_be_canceled = pd.concat([partially_filled_orders, unfilled_orders])
         if self.debug:
             self.post_message(f'partially filled orders found, they are to be canceled: \n{orders_to_be_canceled}')
-        for order_id in orders_to_be_canceled.index:
-            # 部分成交订单不为空，需要生成一条新的交易记录，用于取消订单中的未成交部分，并记录订单结果
-            # TODO: here "submitted" orders can not be canceled, need to be fixed
-            cancel_order(order_id=order_id, data_source=self._datasource)
-            self.post_message(f'canceled unfilled orders')
+        # orders_to_be_canceled的index就是订单的id
+        order_ids = orders_to_be_canceled.index.tolist()
+        # 为所有未完全成交的订单一次性生成交易记录，用于取消订单中的未成交部分，并记录订单结果
+        cancel_orders(order_ids=order_ids, data_source=self._datasource, config=self._config)
+        if order_ids:
+            self.post_message(f'canceled {len(order_ids)} unfilled orders: {order_ids}')
 
         # 检查今日成交结果，完成交易结果的交割
         process_trade_delivery(
@@ -2223,6 +2442,7 @@ class Trader(object):
                 data_source=self._datasource,
                 config=self._config
         )
+        self._invalidate_account_cache()
         self.post_message('processed trade delivery')
 
     def _change_date(self):
@@ -2298,37 +2518,18 @@ class Trader(object):
         # all tasks is run in a separate thread. 未来，可能使用
         #  threading.excepthook()来捕捉产生的exceptions
 
-        available_tasks = {
-            'pre_open':           self._pre_open,
-            'open_market':        self._market_open,
-            'close_market':       self._market_close,
-            'post_close':         self._post_close,
-            'run_strategy':       self._run_strategy,
-            'process_result':     self._process_result,
-            'acquire_live_price': self._update_live_price,
-            'change_date':        self._change_date,
-            'start':              self._start,
-            'stop':               self._stop,
-            'sleep':              self._sleep,
-            'wakeup':             self._wakeup,
-            'pause':              self._pause,
-            'resume':             self._resume,
-            'refill':             self._refill,
-        }
-
         if task is None:
             return
         if not isinstance(task, str):
             raise ValueError(f'task must be a string, got {type(task)} instead.')
 
-        if task not in available_tasks.keys():
+        task_method = self.TASK_METHODS.get(task)
+        if task_method is None:
             raise ValueError(f'Invalid task name: {task}')
 
-        task_func = available_tasks[task]
+        task_func = getattr(self, task_method)
 
-        new_thread_tasks = ['acquire_live_price', 'run_strategy', 'process_result']
-        if task in new_thread_tasks:
-            from threading import Thread
+        if task in self.NEW_THREAD_TASKS:
             if args:
                 t = Thread(target=task_func, args=args, daemon=True)
             else:
@@ -2359,7 +2560,6 @@ class Trader(object):
         if current_date is None:
             # current_date = pd.to_datetime('now', utc=True).tz_convert(TIME_ZONE).date()  # 产生世界时UTC时间
             current_date = self.get_current_tz_datetime().date()  # 产生本地时间
-        from qteasy.utilfuncs import is_market_trade_day
         # exchange = self._config['exchange']  # TODO: should we add exchange to config?
         exchange = 'SSE'
         self.is_trade_day = is_market_trade_day(current_date, exchange)
@@ -2384,50 +2584,60 @@ class Trader(object):
         current_time: datetime.time, optional
             当前时间, 只有任务计划时间小于等于当前时间时才添加任务
             如果current_time为None，则使用当前系统时间，给出current_time的目的是为了方便测试
+
+        Returns
+        -------
+        count_down: float or None
+            到下一个尚未到时间的日程任务的倒计时，单位为秒，任务日程为空时返回None
         """
+        # 非交易日或者当日任务已经全部添加完毕时，任务日程为空，不需要做任何检查
+        if not self.task_daily_schedule:
+            return None
         if current_time is None:
             # current_time = pd.to_datetime('now', utc=True).tz_convert(TIME_ZONE).time()  # 产生UTC时间
             current_time = self.get_current_tz_datetime().time()  # 产生本地时间
         task_added = False  # 是否添加了任务
         next_task = 'None'
-        import datetime as dt
         convenience_date = dt.datetime(2000, 1, 1)
         current_datetime = dt.datetime.combine(convenience_date, current_time)
         end_of_the_day = dt.datetime.combine(convenience_date, dt.time(23, 59, 59))
         count_down_to_next_task = (end_of_the_day - current_datetime).total_seconds()  # 到下一个最近任务的倒计时，单位为秒
         if count_down_to_next_task <= 0:
             count_down_to_next_task = 1
-        # 对比当前时间和任务日程中的任务时间，如果任务时间小于等于当前时间，添加任务到任务队列并删除该任务
-        for idx, task in enumerate(self.task_daily_schedule):
-            task_time = pd.to_datetime(task[0], utc=True).time()
-            # 当task_time小于等于current_time时，添加task，同时删除该task
-            if task_time <= current_time:
-                task_tuple = self.task_daily_schedule.pop(idx)
-                if self.debug:
-                    self.post_message(f'adding task: {task_tuple} from agenda')
-                if len(task_tuple) == 3:
-                    task = task_tuple[1:3]
-                elif len(task_tuple) == 2:
-                    task = task[1]
-                else:
-                    raise ValueError(f'Invalid task tuple: No task found in {task_tuple}')
-
-                if self.debug:
-                    self.post_message(f'current time {current_time} >= task time {task_time}, '
-                                      f'adding task: {task} from agenda')
-                self._add_task_to_queue(task)
-                task_added = True
-            # 计算count_down_to_next_task秒数
-            else:
+        # 任务日程已经按时间排序，从第一个任务开始对比当前时间和任务时间，如果任务时间小于等于当前时间，
+        # 添加任务到任务队列并删除该任务，直到遇到第一个尚未到时间的任务为止，不需要检查后面的任务
+        while self.task_daily_schedule:
+            task = self.task_daily_schedule[0]
+            task_time = _parse_task_time(task[0])
+            # 当task_time大于current_time时，计算count_down_to_next_task秒数，后面的任务都还未到时间
+            if task_time > current_time:
                 task_datetime = dt.datetime.combine(convenience_date, task_time)
                 count_down_sec = (task_datetime - current_datetime).total_seconds()
                 if count_down_sec < count_down_to_next_task:
                     count_down_to_next_task = count_down_sec
                     next_task = task
+                break
+            # 当task_time小于等于current_time时，添加task，同时删除该task
+            task_tuple = self.task_daily_schedule.pop(0)
+            if self.debug:
+                self.post_message(f'adding task: {task_tuple} from agenda')
+            if len(task_tuple) == 3:
+                task = task_tuple[1:3]
+            elif len(task_tuple) == 2:
+                task = task[1]
+            else:
+                raise ValueError(f'Invalid task tuple: No task found in {task_tuple}')
+
+            if self.debug:
+                self.post_message(f'current time {current_time} >= task time {task_time}, '
+                                  f'adding task: {task} from agenda')
+            self._agenda_queue.append(task)
+            task_added = True
         if not task_added:
             self.post_message(f'Next task:({next_task[1]}) in '
                               f'{sec_to_duration(count_down_to_next_task, estimation=True)}',
                               new_line=False)
+        return count_down_to_next_task
 
     def _initialize_schedule(self, current_time=None):
         """ 初始化交易日的任务日程, 在任务清单中添加以下任务：
@@ -2461,46 +2671,19 @@ class Trader(object):
                 self.operator,
                 self._config
         )
-        # 根据当前时间删除过期的任务
-        moa = pd.to_datetime(self._config['market_open_time_am']).time()
-        mca = pd.to_datetime(self._config['market_close_time_am']).time()
-        moc = pd.to_datetime(self._config['market_open_time_pm']).time()
-        mcc = pd.to_datetime(self._config['market_close_time_pm']).time()
-        if current_time < moa:
-            # before market morning open, keep all tasks
-            if self.debug:
-                self.post_message('before market morning open, keeping all tasks')
-        elif moa < current_time < mca:
-            # market open time, remove all task before current time except pre_open
-            if self.debug:
-                self.post_message('market open, removing all tasks before current time except pre_open and open_market')
-            self.task_daily_schedule = [task for task in self.task_daily_schedule if
-                                        (pd.to_datetime(task[0]).time() >= current_time) or
-                                        (task[1] in ['pre_open', 'open_market'])]
-        elif mca < current_time < moc:
-            # before market afternoon open, remove all task before current time except pre_open, open_market and sleep
-            if self.debug:
-                self.post_message('before market afternoon open, removing all tasks before current time '
-                                  'except pre_open, open_market and sleep')
-            self.task_daily_schedule = [task for task in self.task_daily_schedule if
-                                        (pd.to_datetime(task[0]).time() >= current_time) or
-                                        (task[1] in ['pre_open', 'open_market', 'sleep'])]
-        elif moc < current_time < mcc:
-            # market afternoon open, remove all task before current time except pre_open, open_market, sleep, and wakeup
-            if self.debug:
-                self.post_message('market afternoon open, removing all tasks before current time '
-                                  'except pre_open, open_market, sleep and wakeup')
-            self.task_daily_schedule = [task for task in self.task_daily_schedule if
-                                        (pd.to_datetime(task[0]).time() >= current_time) or
-                                        (task[1] in ['pre_open', 'open_market'])]
-        elif mcc < current_time:
-            # after market close, remove all task before current time except post_close
-            if self.debug:
-                self.post_message('market closed, removing all tasks before current time except post_close')
+        # 根据当前时间所处的交易时段删除过期的任务，任务时间的解析结果已被缓存
+        market_bounds = (
+            _parse_task_time(self._config['market_open_time_am']),
+            _parse_task_time(self._config['market_close_time_am']),
+            _parse_task_time(self._config['market_open_time_pm']),
+            _parse_task_time(self._config['market_close_time_pm']),
+        )
+        exempt_tasks, message = SCHEDULE_EXPIRED_TASK_EXEMPTIONS[bisect_right(market_bounds, current_time)]
+        if self.debug:
+            self.post_message(message)
+        if exempt_tasks is not None:
             self.task_daily_schedule = [task for task in self.task_daily_schedule if
-                                        (pd.to_datetime(task[0]).time() >= current_time) or (task[1] == 'post_close')]
-        else:
-            raise ValueError(f'Invalid current time: {current_time}')
+                                        (_parse_task_time(task[0]) >= current_time) or (task[1] in exempt_tasks)]
 
     def _change_cash(self, amount):
         """ 手动修改现金，根据amount的正负号，增加或减少现金
@@ -2517,8 +2700,6 @@ class Trader(object):
         -------
         None
         """
-        from qteasy.trade_recording import update_account_balance, get_account_cash_availabilities
-
         cash_amount, available_cash, total_invest = get_account_cash_availabilities(
                 account_id=self.account_id,
                 data_source=self.datasource
@@ -2536,6 +2717,7 @@ class Trader(object):
                 data_source=self.datasource,
                 **amount_change
         )
+        self._invalidate_account_cache()
         self.post_message(f'Cash amount changed to {self.account_cash}')
         return
 
@@ -2564,8 +2746,6 @@ class Trader(object):
         None
         """
 
-        from qteasy.trade_recording import get_or_create_position, get_position_by_id, update_position, get_position_ids
-
         position_ids = get_position_ids(
                 account_id=self.account_id,
                 symbol=symbol,
@@ -2648,6 +2828,7 @@ class Trader(object):
                 data_source=self.datasource,
                 **position_data
         )
+        self._invalidate_account_cache()
         return
 
     def _update_live_price(self):
@@ -2659,7 +2840,6 @@ class Trader(object):
             real_time_data = stock_live_kline_price(symbols=self.asset_pool)
         except Exception as e:
             if self.debug:
-                import traceback
                 self.post_message(f'Error in acquiring live prices: {e}')
                 traceback.print_exc()
             return None
@@ -2675,14 +2855,39 @@ class Trader(object):
             self.post_message(f'acquired live price data, live prices updated!')
         return
 
+    # 任务名称及执行任务的方法名，每次执行任务时不需要重新生成所有任务方法的字典
+    TASK_METHODS = {
+        'pre_open':             '_pre_open',
+        'open_market':          '_market_open',
+        'close_market':         '_market_close',
+        'post_close':           '_post_close',
+        'run_strategy':         '_run_strategy',
+        'process_result':       '_process_result',
+        'process_result_batch': '_process_result_batch',
+        'acquire_live_price':   '_update_live_price',
+        'change_date':          '_change_date',
+        'start':                '_start',
+        'stop':                 '_stop',
+        'sleep':                '_sleep',
+        'wakeup':               '_wakeup',
+        'pause':                '_pause',
+        'resume':               '_resume',
+        'refill':               '_refill',
+    }
+
+    # 需要在新的线程中运行的任务
+    NEW_THREAD_TASKS = frozenset({'acquire_live_price', 'run_strategy', 'process_result', 'process_result_batch'})
+
+    # 每个状态下允许执行的任务，使用frozenset以便在每次分派任务时快速检查
     TASK_WHITELIST = {
-        'stopped':  ['start'],
-        'running':  ['stop', 'sleep', 'pause', 'run_strategy', 'process_result', 'pre_open',
-                     'open_market', 'close_market', 'acquire_live_price'],
-        'sleeping': ['wakeup', 'stop', 'pause', 'pre_open',
-                     'process_result',  # 如果交易结果已经产生，哪怕处理时Trader已经处于sleeping状态，也应该处理完所有结果
-                     'open_market', 'post_close', 'refill'],
-        'paused':   ['resume', 'stop'],
+        'stopped':  frozenset({'start'}),
+        'running':  frozenset({'stop', 'sleep', 'pause', 'run_strategy', 'process_result', 'process_result_batch',
+                               'pre_open', 'open_market', 'close_market', 'acquire_live_price'}),
+        'sleeping': frozenset({'wakeup', 'stop', 'pause', 'pre_open',
+                               # 如果交易结果已经产生，哪怕处理时Trader已经处于sleeping状态，也应该处理完所有结果
+                               'process_result', 'process_result_batch',
+                               'open_market', 'post_close', 'refill'}),
+        'paused':   frozenset({'resume', 'stop'}),
     }
 
 
@@ -2743,21 +2948,22 @@ def start_trader(
     if init_holdings is not None:
         if not isinstance(init_holdings, dict):
             raise ValueError(f'init_holdings must be a dict, got {type(init_holdings)} instead.')
-        for symbol, amount in init_holdings.items():
-            pos_id = get_or_create_position(
-                    account_id=account_id,
-                    symbol=symbol,
-                    position_type='long' if amount > 0 else 'short',
-                    data_source=datasource,
-            )
-            update_position(
-                    position_id=pos_id,
-                    data_source=datasource,
-                    **{
+        # 一次性获取或创建所有持仓，再一次性更新所有持仓的数量
+        pos_ids = get_or_create_positions(
+                account_id=account_id,
+                symbols=list(init_holdings.keys()),
+                position_types=['long' if amount > 0 else 'short' for amount in init_holdings.values()],
+                data_source=datasource,
+        )
+        update_positions(
+                {
+                    pos_id: {
                         'qty_change':           abs(amount),
                         'available_qty_change': abs(amount),
-                    }
-            )
+                    } for pos_id, amount in zip(pos_ids, init_holdings.values())
+                },
+                data_source=datasource,
+        )
 
     # if account is ready then create trader and broker
     broker_type = config['live_trade_broker_type']
@@ -2844,7 +3050,6 @@ def refill_missing_datasource_data(operator, trader, config, datasource):
         last_available_date = pd.to_datetime(last_available_date)
     except:
         last_available_date = trader.get_current_tz_datetime() - pd.Timedelta(value=100, unit='d')
-    from qteasy.utilfuncs import prev_market_trade_day
     today = trader.get_current_tz_datetime().strftime('%Y%m%d')
     last_trade_day = prev_market_trade_day(today) - pd.Timedelta(value=1, unit='d')
 
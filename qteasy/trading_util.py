@@ -23,6 +23,8 @@ from qteasy.trade_recording import read_trade_order_detail, read_trade_results_b
 from qteasy.trade_recording import read_trade_results_by_order_id, get_account_cash_availabilities
 from qteasy.trade_recording import update_account_balance, update_position, update_trade_result
 from qteasy.trade_recording import query_trade_orders, get_account_positions
+from qteasy.trade_recording import read_trade_orders, get_positions_by_ids, update_trade_orders_status
+from qteasy.trade_recording import write_trade_results
 
 # TODO: read TIMEZONE from qt config arguments
 TIMEZONE = 'Asia/Shanghai'
@@ -524,6 +526,14 @@ def _signal_to_order_elements(shares,
         #       f'{cash_to_spend * available_cash / total_cash_to_spend} ')
         cash_to_spend = cash_to_spend * available_cash / total_cash_to_spend
 
+    # 一次性计算所有资产的买入、卖出数量并取整，避免在下面的循环中对每个数量逐一调用np.round
+    with np.errstate(divide='ignore', invalid='ignore'):
+        buy_quantities = np.round(cash_to_spend / prices, AMOUNT_DECIMAL_PLACES)
+    sell_quantities = np.round(amounts_to_sell, AMOUNT_DECIMAL_PLACES)
+    available_quantities = np.round(available_amounts, AMOUNT_DECIMAL_PLACES)
+    short_available_quantities = np.round(available_amounts, 2)
+    excess_quantities = np.round(amounts_to_sell + available_amounts, AMOUNT_DECIMAL_PLACES)
+
     # 逐个计算每一只资产的买入和卖出的数量
     symbols = []
     positions = []
@@ -538,7 +548,7 @@ def _signal_to_order_elements(shares,
         # 计算多头买入的数量
         if cash_to_spend[i] > 0.001:
             # 计算买入的数量
-            quantity = np.round(cash_to_spend[i] / prices[i], AMOUNT_DECIMAL_PLACES)
+            quantity = buy_quantities[i]
             if moq_buy > 0:
                 quantity = np.trunc(quantity / moq_buy) * moq_buy
             symbols.append(sym)
@@ -549,7 +559,7 @@ def _signal_to_order_elements(shares,
         # 计算空头买入的数量
         if (cash_to_spend[i] < -0.001) and allow_sell_short:
             # 计算买入的数量
-            quantity = np.round(-cash_to_spend[i] / prices[i], AMOUNT_DECIMAL_PLACES)
+            quantity = -buy_quantities[i]
             if moq_buy > 0:
                 quantity = np.trunc(quantity / moq_buy) * moq_buy
             symbols.append(sym)
@@ -562,7 +572,7 @@ def _signal_to_order_elements(shares,
             # 计算卖出的数量，如果可用资产不足，则降低卖出的数量，并增加相反头寸的买入数量，买入剩余的数量
             if amounts_to_sell[i] < -available_amounts[i]:
                 # 计算卖出的数量
-                quantity = np.round(available_amounts[i], AMOUNT_DECIMAL_PLACES)
+                quantity = available_quantities[i]
                 if moq_sell > 0:
                     quantity = np.trunc(quantity / moq_sell) * moq_sell
                 symbols.append(sym)
@@ -572,7 +582,7 @@ def _signal_to_order_elements(shares,
                 quoted_prices.append(prices[i])
                 # 如果allow_sell_short，增加反向头寸的买入信号
                 if allow_sell_short:
-                    quantity = np.round(- amounts_to_sell[i] - available_amounts[i], AMOUNT_DECIMAL_PLACES)
+                    quantity = -excess_quantities[i]
                     if moq_sell > 0:
                         quantity =np.trunc(quantity / moq_sell) * moq_sell
                     symbols.append(sym)
@@ -582,7 +592,7 @@ def _signal_to_order_elements(shares,
                     quoted_prices.append(prices[i])
             else:
                 # 计算卖出的数量，如果可用资产足够，则直接卖出
-                quantity = np.round(-amounts_to_sell[i], AMOUNT_DECIMAL_PLACES)
+                quantity = -sell_quantities[i]
                 if moq_sell > 0:
                     quantity = np.trunc(quantity / moq_sell) * moq_sell
                 symbols.append(sym)
@@ -595,7 +605,7 @@ def _signal_to_order_elements(shares,
             # 计算卖出的数量，如果可用资产不足，则降低卖出的数量，并增加相反头寸的买入数量，买入剩余的数量
             if amounts_to_sell[i] > available_amounts[i]:
                 # 计算卖出的数量
-                quantity = np.round(- available_amounts[i], 2)
+                quantity = -short_available_quantities[i]
                 if moq_sell > 0:
                     quantity = np.trunc(quantity / moq_sell) * moq_sell
                 symbols.append(sym)
@@ -604,7 +614,7 @@ def _signal_to_order_elements(shares,
                 quantities.append(quantity)
                 quoted_prices.append(prices[i])
                 # 增加反向头寸的买入信号
-                quantity = np.round(amounts_to_sell[i] + available_amounts[i], AMOUNT_DECIMAL_PLACES)
+                quantity = excess_quantities[i]
                 if moq_sell > 0:
                     quantity = np.trunc(quantity / moq_sell) * moq_sell
                 symbols.append(sym)
@@ -614,7 +624,7 @@ def _signal_to_order_elements(shares,
                 quoted_prices.append(prices[i])
             else:
                 # 计算卖出的数量，如果可用资产足够，则直接卖出
-                quantity = np.round(amounts_to_sell[i], AMOUNT_DECIMAL_PLACES)
+                quantity = sell_quantities[i]
                 if moq_sell > 0:
                     quantity = np.trunc(quantity / moq_sell) * moq_sell
                 symbols.append(sym)
@@ -705,6 +715,71 @@ def submit_order(order_id, data_source=None):
     return order_id
 
 
+def submit_orders(order_ids, data_source=None):
+    """ 一次性提交多个交易订单，与逐个调用submit_order()的结果相同
+
+    所有交易订单、相关持仓和账户信息只需要读取一次，所有订单的状态也只需要写入一次，
+    适用于同一次策略运行中生成的大量交易订单
+
+    Parameters
+    ----------
+    order_ids: list of int
+        交易订单的id
+    data_source: str, optional
+        数据源的名称, 默认为None, 表示使用默认的数据源
+
+    Returns
+    -------
+    list: 与order_ids顺序一致的提交结果，成功提交的订单为其id，状态不为created的订单为None
+
+    Raises
+    ------
+    RuntimeError: 如果order_ids中有任何一个交易订单不存在
+    """
+
+    if len(order_ids) == 0:
+        return []
+
+    # 一次读取所有的交易订单及其持仓
+    trade_orders = read_trade_orders(order_ids, data_source=data_source)
+    missing_ids = [order_id for order_id in order_ids
+                   if (trade_orders is None) or (order_id not in trade_orders.index)]
+    if missing_ids:
+        raise RuntimeError(f'Trade orders (order_ids = {missing_ids}) not found!')
+    trade_orders = trade_orders.loc[trade_orders['status'] == 'created']
+    if trade_orders.empty:
+        return [None] * len(order_ids)
+    positions = get_positions_by_ids(trade_orders['pos_id'].tolist(), data_source=data_source)
+    if (positions.loc[trade_orders['pos_id'], 'position'] == 'short').any():
+        # TODO: position为short时做法不同，需要进一步调整
+        raise NotImplementedError('short position orders submission is not realized')
+
+    accounts = {}
+    for order_id, trade_order in trade_orders.iterrows():
+        position = positions.loc[trade_order['pos_id']]
+        if trade_order['direction'] == 'buy':
+            account_id = position['account_id']
+            if account_id not in accounts:
+                accounts[account_id] = get_account(account_id, data_source=data_source)
+            # 如果账户的现金不足，则输出警告信息
+            if accounts[account_id]['available_cash'] < trade_order['qty'] * trade_order['price']:
+                logger.warning(f'Available cash {accounts[account_id]["available_cash"]} is not enough for '
+                               f'trade order: \n'
+                               f'{trade_order.to_dict()}'
+                               f'trade order might not be executed!')
+        elif trade_order['direction'] == 'sell':
+            # 如果账户的持仓不足，则输出警告信息
+            if position['available_qty'] < trade_order['qty']:
+                logger.warning(f'Available quantity {position["available_qty"]} is not enough for trade order: \n'
+                               f'{trade_order.to_dict()}'
+                               f'trade order might not be executed!')
+
+    # 将所有订单的status一次性改为"submitted"
+    submitted = set(update_trade_orders_status(trade_orders.index.tolist(), 'submitted', data_source=data_source))
+
+    return [order_id if order_id in submitted else None for order_id in order_ids]
+
+
 def cancel_order(order_id, data_source=None, config=None):
     """ 取消交易订单
 
@@ -779,6 +854,87 @@ def cancel_order(order_id, data_source=None, config=None):
     )
 
 
+def cancel_orders(order_ids, data_source=None, config=None):
+    """ 一次性取消多个交易订单，与逐个调用cancel_order()的结果相同
+
+    所有订单、持仓和交易结果只需要读取一次，所有订单的取消结果和订单状态也只需要写入一次。
+    取消订单的交易结果中成交数量和交易费用都为0，不会改变账户的现金和持仓，因此不需要逐个更新账户和持仓。
+    任意一个订单不能被取消时，所有订单都不会被取消
+
+    Parameters
+    ----------
+    order_ids: list of int
+        交易订单的id
+    data_source: str, optional
+        数据源的名称, 默认为None, 表示使用默认的数据源
+    config: dict, optional
+        配置参数，主要包含股票和现金交割周期信息，如果为None，则使用默认的配置参数
+
+    Returns
+    -------
+    list of int, 订单取消结果的交易结果id，顺序与order_ids一致
+    """
+
+    order_ids = list(dict.fromkeys(order_ids))
+    if len(order_ids) == 0:
+        return []
+
+    trade_orders = read_trade_orders(order_ids, data_source=data_source)
+    missing_ids = [order_id for order_id in order_ids
+                   if (trade_orders is None) or (order_id not in trade_orders.index)]
+    if missing_ids:
+        raise RuntimeError(f'Trade orders (order_ids = {missing_ids}) not found!')
+    trade_orders = trade_orders.loc[order_ids]
+    wrong_status = trade_orders.loc[~trade_orders['status'].isin(['submitted', 'partial-filled']), 'status']
+    if not wrong_status.empty:
+        raise RuntimeError(f'order status wrong: {wrong_status.iloc[0]} cannot be canceled')
+
+    # 一次读取所有订单的交易结果，计算每个订单已经成交和已经取消的数量
+    order_results = read_trade_results_by_order_id(order_id=order_ids, data_source=data_source)
+    total_filled_qty = order_results.groupby('order_id')['filled_qty'].sum()
+    already_canceled_qty = order_results.groupby('order_id')['canceled_qty'].sum()
+
+    execution_time = pd.to_datetime('today').strftime('%Y-%m-%d %H:%M:%S')  # 产生本地时区时间
+    results_of_cancel = []
+    for order_id, trade_order in trade_orders.iterrows():
+        if np.round(already_canceled_qty.get(order_id, 0.), AMOUNT_DECIMAL_PLACES) > 0:
+            raise RuntimeError(f'order status wrong: canceled qty should be 0 '
+                               f'unless order is canceled! actual: {already_canceled_qty[order_id]} '
+                               f'for order \n{trade_order.to_dict()}')
+        remaining_qty = np.round(
+                trade_order['qty'] - np.round(total_filled_qty.get(order_id, 0.), AMOUNT_DECIMAL_PLACES),
+                AMOUNT_DECIMAL_PLACES,
+        )
+        if remaining_qty <= 0:
+            raise RuntimeError(f'order status wrong: remaining qty should be larger than 0'
+                               f'when order is partially filled, got {remaining_qty}')
+        results_of_cancel.append(
+                {
+                    'order_id':        order_id,
+                    'filled_qty':      0.,
+                    'price':           trade_order['price'],
+                    'transaction_fee': 0.,
+                    'execution_time':  execution_time,
+                    'canceled_qty':    remaining_qty,
+                    'delivery_amount': 0.,
+                    'delivery_status': 'ND',
+                }
+        )
+
+    # 与process_trade_result()相同，写入交易结果前先交割所有相关账户的历史交易结果
+    if config is None:
+        import qteasy as qt
+        config = qt.QT_CONFIG
+    positions = get_positions_by_ids(trade_orders['pos_id'].tolist(), data_source=data_source)
+    for account_id in positions['account_id'].unique():
+        process_trade_delivery(account_id=account_id, data_source=data_source, config=config)
+
+    result_ids = write_trade_results(results_of_cancel, data_source=data_source)
+    update_trade_orders_status(order_ids, 'canceled', data_source=data_source)
+
+    return result_ids
+
+
 def process_trade_delivery(account_id, data_source=None, config=None):
     """ 处理account_id账户中所有持仓和现金的交割
 
@@ -1045,7 +1201,7 @@ def process_trade_result(raw_trade_result, data_source=None, config=None):
     return result_id
 
 
-def get_last_trade_result_summary(account_id, shares=None, data_source=None):
+def get_last_trade_result_summary(account_id, shares=None, data_source=None, positions=None):
     """ 获取指定账户的最近的交易结果汇总，获取的结果为ndarray，按照shares的顺序排列
 
     结果包含最近一次成交量（正数表示买入，负数表示卖出）以及最近一次成交价格，如果最近没有成交，
@@ -1059,6 +1215,8 @@ def get_last_trade_result_summary(account_id, shares=None, data_source=None):
         股票代码列表, 如果不给出股票代码列表，则返回所有持仓股票的最近一次成交量和成交价格
     data_source: str,
         数据源名称
+    positions: pd.DataFrame, optional
+        已经由get_account_positions()读取的账户持仓，给出时不再重复读取持仓表
 
     Returns
     -------
@@ -1074,7 +1232,9 @@ def get_last_trade_result_summary(account_id, shares=None, data_source=None):
 
     # read all filled and partially filled orders
 
-    all_positions = get_account_positions(account_id=account_id, data_source=data_source)
+    all_positions = positions
+    if all_positions is None:
+        all_positions = get_account_positions(account_id=account_id, data_source=data_source)
     if all_positions.empty and (shares is None):
         return [], np.array([]), np.array([])
 
@@ -1132,20 +1292,9 @@ def get_last_trade_result_summary(account_id, shares=None, data_source=None):
     last_filled_qty = {all_position_symbols[k]: v for k, v in last_filled_qty.items()}
     last_filled_price = {all_position_symbols[k]: v for k, v in last_filled_price.items()}
 
-    # update filled qty and filled prices with last filled qty and last filled price
-    shares_filled_qty = {k: 0 for k in shares}
-    shares_filled_price = {k: 0 for k in shares}
-    shares_filled_qty.update(last_filled_qty)
-    shares_filled_price.update(last_filled_price)
-    last_filled_qty = shares_filled_qty
-    last_filled_price = shares_filled_price
-
-    # 删除生成的结果中不需要的shares
-    last_filled_qty = {k: v for k, v in last_filled_qty.items() if k in shares}
-    last_filled_price = {k: v for k, v in last_filled_price.items() if k in shares}
-
-    amounts_changed = np.array(list(last_filled_qty.values()), dtype='float')
-    trade_prices = np.array(list(last_filled_price.values()), dtype='float')
+    # 按照shares的顺序逐个查找最近的成交量和成交价格，没有成交记录的share填充0，不在shares中的symbol不会出现在结果中
+    amounts_changed = np.array([last_filled_qty.get(k, 0) for k in shares], dtype='float')
+    trade_prices = np.array([last_filled_price.get(k, 0) for k in shares], dtype='float')
     return shares, amounts_changed, trade_prices
 
 
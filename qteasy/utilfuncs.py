@@ -18,6 +18,11 @@ import time
 import warnings
 from numba import njit
 from functools import wraps, lru_cache
+from datetime import datetime
+try:
+    from zoneinfo import ZoneInfo as _time_zone_info
+except ImportError:  # python < 3.9中没有zoneinfo，使用pandas依赖的pytz
+    from pytz import timezone as _time_zone_info
 
 TIME_FREQ_LEVELS = {
     'Y':      10,
@@ -36,6 +41,9 @@ TIME_FREQ_LEVELS = {
 }  # TODO: 最好是将所有的frequency封装为一个类，确保字符串大小写正确，且引入复合频率的比较和处理
 TIME_FREQ_STRINGS = list(TIME_FREQ_LEVELS.keys())
 AVAILABLE_ASSET_TYPES = ['E', 'IDX', 'FT', 'FD', 'OPT']
+# PUBLIC_HOLIDAYS 是一个含两个list的tuple，存储了闭市的公共假期，第一个list是代表月份的数字，第二个list是代表日期的数字
+PUBLIC_HOLIDAYS = ([1, 1, 1, 4, 4, 4, 5, 5, 5, 10, 10, 10, 10, 10, 10, 10],
+                   [1, 2, 3, 3, 4, 5, 1, 2, 3, 1, 2, 3, 4, 5, 6, 7])
 PROGRESS_BAR = {0:  '----------------------------------------', 1: '#---------------------------------------',
                 2:  '##--------------------------------------', 3: '###-------------------------------------',
                 4:  '####------------------------------------', 5: '#####-----------------------------------',
@@ -58,6 +66,8 @@ PROGRESS_BAR = {0:  '----------------------------------------', 1: '#-----------
                 38: '######################################--', 39: '#######################################-',
                 40: '########################################'
                 }
+# 进度条两次刷新之间的最短时间间隔（秒），避免在循环中频繁刷新进度条时大量输出阻塞程序运行
+PROGRESS_BAR_MIN_INTERVAL = 0.1
 NUMBER_IDENTIFIER = re.compile(r'^-?(0|[1-9]\d*)?(\.\d+)?(?<=\d)$')
 INTEGER_IDENTIFIER = re.compile(r'^-?(0|[1-9]\d*)$')
 FLOAT_IDENTIFIER = re.compile(r'^-?(0|[1-9]\d*)?(\.\d+)?(?<=\d)$')
@@ -748,9 +758,15 @@ def list_to_str_format(str_list: [list, str]) -> str:
     return res[0:-1]
 
 
+# 进度条上一次刷新的时间，由progress_bar()更新
+_progress_bar_last_refresh = 0.
+
+
 def progress_bar(prog: int, total: int = 100, comments: str = ''):
     """根据输入的数字生成进度条字符串并刷新
 
+    当距离上一次刷新的时间小于PROGRESS_BAR_MIN_INTERVAL时跳过本次刷新，但进度达到100%时总会刷新
+
     Parameters
     ----------
     prog: int
@@ -760,16 +776,21 @@ def progress_bar(prog: int, total: int = 100, comments: str = ''):
     comments: str, optional
         需要显示在进度条中的文字信息
     """
+    global _progress_bar_last_refresh
     if total > 0:
         if prog > total:
             prog = total
+        current_time = time.monotonic()
+        if (prog < total) and (current_time - _progress_bar_last_refresh < PROGRESS_BAR_MIN_INTERVAL):
+            return
+        _progress_bar_last_refresh = current_time
         progress_str = f'\r \r[{PROGRESS_BAR[int(prog / total * 40)]}]' \
                        f'{prog}/{total}-{np.round(prog / total * 100, 1)}%  {comments}'
         sys.stdout.write(progress_str)
         sys.stdout.flush()
 
 
-def get_current_tz_datetime(self, time_zone='local'):
+def get_current_tz_datetime(time_zone='local'):
     """ 获取指定时区的当前时间，同时确保返回的时间是tz_naive的
 
     如果time_zone为'local', 获取当前时区的当前时间。
@@ -780,12 +801,28 @@ def get_current_tz_datetime(self, time_zone='local'):
     time_zone: str, default: 'local'
         符合标准的时区字符串
     """
+    # pd.Timestamp.now()直接读取系统时间，比pd.to_datetime('today')解析字符串快得多
     if time_zone == 'local':
-        return pd.to_datetime('today')
+        return pd.Timestamp.now()
     else:
-        # create utc time and convert to time_zone time and remove time_zone information
-        dt = pd.to_datetime('now', utc=True).tz_convert(self.time_zone)
-        return pd.to_datetime(dt.tz_localize(None))
+        # 获取time_zone时区的当前时间，并去掉时区信息，时区对象只解析一次，避免每次由pandas解析时区字符串
+        return pd.Timestamp(datetime.now(_get_time_zone(time_zone)).replace(tzinfo=None))
+
+
+@lru_cache(maxsize=16)
+def _get_time_zone(time_zone):
+    """ 根据时区字符串获取时区对象并缓存
+
+    Parameters
+    ----------
+    time_zone: str
+        符合标准的时区字符串，如'Asia/Shanghai'
+
+    Returns
+    -------
+    tzinfo
+    """
+    return _time_zone_info(time_zone)
 
 
 @lru_cache(maxsize=16)
@@ -814,16 +851,13 @@ def maybe_trade_day(date):
     >>> maybe_trade_day('2023-04-11')
     True
     """
-    # public_holidays 是一个含两个list的tuple，存储了闭市的公共假期，第一个list是代表月份的数字，第二个list是代表日期的数字
-    public_holidays = ([1, 1, 1, 4, 4, 4, 5, 5, 5, 10, 10, 10, 10, 10, 10, 10],
-                       [1, 2, 3, 3, 4, 5, 1, 2, 3, 1, 2, 3, 4, 5, 6, 7])
     try:
         date = pd.to_datetime(date).floor(freq='d')
     except Exception:
         raise ValueError('date is not a valid date time format, cannot be converted to timestamp')
     if date.weekday() > 4:
         return False
-    for m, d in zip(public_holidays[0], public_holidays[1]):
+    for m, d in zip(PUBLIC_HOLIDAYS[0], PUBLIC_HOLIDAYS[1]):
         if date.month == m and date.day == d:
             return False
     return True
@@ -885,6 +919,70 @@ def next_trade_day(date):
     return next
 
 
+# 缓存从QT_TRADE_CALENDAR中取出的各个交易所的交易日历，{exchange: (QT_TRADE_CALENDAR, exchange_trade_cal)}
+_EXCHANGE_TRADE_CALENDARS = {}
+
+
+def _get_exchange_trade_calendar(exchange):
+    """ 从QT_TRADE_CALENDAR中取出某个交易所的交易日历，取出的交易日历会被缓存，避免每次判断交易日时
+    都重新从完整的交易日历中切片，当QT_TRADE_CALENDAR被替换后，缓存自动失效
+
+    Parameters
+    ----------
+    exchange: str
+        交易所代码，参见is_market_trade_day()
+
+    Raises
+    ------
+    KeyError: 当交易日历中不存在该交易所的数据时
+
+    Returns
+    -------
+    pd.DataFrame: 以日期为index的交易所交易日历，包含is_open和pretrade_date两列
+    """
+    trade_calendar = qteasy.QT_TRADE_CALENDAR
+    cached = _EXCHANGE_TRADE_CALENDARS.get(exchange)
+    if (cached is not None) and (cached[0] is trade_calendar):
+        return cached[1]
+    try:
+        exchange_trade_cal = trade_calendar.loc[exchange]
+    except KeyError as e:
+        raise KeyError(f'Trade Calender for exchange: {e} was not properly downloaded, please refill data')
+    _EXCHANGE_TRADE_CALENDARS[exchange] = (trade_calendar, exchange_trade_cal)
+    return exchange_trade_cal
+
+
+# 缓存各个交易所按时间顺序排列的所有开市日，{exchange: (QT_TRADE_CALENDAR, open_days)}
+_EXCHANGE_OPEN_DAYS = {}
+
+
+def _get_exchange_open_days(exchange):
+    """ 从交易所的交易日历中取出所有开市日，按时间顺序排列后缓存，当QT_TRADE_CALENDAR被替换后，缓存自动失效
+
+    Parameters
+    ----------
+    exchange: str
+        交易所代码，参见is_market_trade_day()
+
+    Raises
+    ------
+    KeyError: 当交易日历中不存在该交易所的数据时
+
+    Returns
+    -------
+    pd.DatetimeIndex: 按时间顺序排列的所有开市日
+    """
+    trade_calendar = qteasy.QT_TRADE_CALENDAR
+    cached = _EXCHANGE_OPEN_DAYS.get(exchange)
+    if (cached is not None) and (cached[0] is trade_calendar):
+        return cached[1]
+    exchange_trade_cal = _get_exchange_trade_calendar(exchange)
+    is_open = exchange_trade_cal['is_open'].to_numpy() == 1
+    open_days = pd.DatetimeIndex(exchange_trade_cal.index[is_open]).sort_values()
+    _EXCHANGE_OPEN_DAYS[exchange] = (trade_calendar, open_days)
+    return open_days
+
+
 @lru_cache(maxsize=16)
 def is_market_trade_day(date, exchange: str = 'SSE'):
     """ 根据交易所发布的交易日历判断一个日期是否是交易日，
@@ -925,10 +1023,7 @@ def is_market_trade_day(date, exchange: str = 'SSE'):
                                                       'DCE', 'INE', 'IB', 'XHKG']:
         raise TypeError(f'exchange \'{exchange}\' is not a valid input')
     if qteasy.QT_TRADE_CALENDAR is not None:
-        try:
-            exchange_trade_cal = qteasy.QT_TRADE_CALENDAR.loc[exchange]
-        except KeyError as e:
-            raise KeyError(f'Trade Calender for exchange: {e} was not properly downloaded, please refill data')
+        exchange_trade_cal = _get_exchange_trade_calendar(exchange)
         try:
             is_open = exchange_trade_cal.loc[_date].is_open
         except KeyError:
@@ -939,6 +1034,45 @@ def is_market_trade_day(date, exchange: str = 'SSE'):
         return maybe_trade_day(_date)
 
 
+def market_trade_day_mask(dates, exchange: str = 'SSE'):
+    """ 根据交易所发布的交易日历判断一组日期是否是交易日，与is_market_trade_day()相同，
+    但一次性在交易日历中查找所有的日期，不需要逐个判断
+
+    Parameters
+    ----------
+    dates: iterable of datetime like
+        一组可以转化为时间日期格式的字符串或其他类型对象
+    exchange: str
+        交易所代码，参见is_market_trade_day()
+
+    Raises
+    ------
+    ValueError: 当任意日期超出交易日历的范围时
+
+    Returns
+    -------
+    np.ndarray of bool: 与dates长度相同的数组，True表示是交易日，False表示不是交易日
+
+    Examples
+    --------
+    >>> market_trade_day_mask(['2019-01-01', '2019-01-02'])
+    array([False,  True])
+    """
+    dates = pd.DatetimeIndex(pd.to_datetime(dates)).floor(freq='d')
+    if qteasy.QT_TRADE_CALENDAR is None:
+        warnings.warn('Trade Calendar is not available, will use maybe_trade_day instead to check trade day')
+        # 与maybe_trade_day()的判断相同，但一次性判断所有日期是否周末或公共假期
+        holidays = np.array(PUBLIC_HOLIDAYS[0]) * 100 + np.array(PUBLIC_HOLIDAYS[1])
+        is_holiday = np.isin(dates.month * 100 + dates.day, holidays)
+        return np.asarray((dates.weekday < 5) & ~is_holiday, dtype='bool')
+    exchange_trade_cal = _get_exchange_trade_calendar(exchange)
+    is_open = exchange_trade_cal['is_open'].reindex(dates)
+    out_of_range = is_open.isna().to_numpy()
+    if out_of_range.any():
+        raise ValueError(f'The date {dates[out_of_range][0]} is out of trade calendar range, please refill data')
+    return (is_open == 1).to_numpy()
+
+
 @lru_cache(maxsize=4)
 def last_known_market_trade_day(exchange: str = 'SSE'):
     """ 返回交易日列表中的最后一个已知交易日
@@ -962,11 +1096,8 @@ def last_known_market_trade_day(exchange: str = 'SSE'):
                                                       'DCE', 'INE', 'IB', 'XHKG']:
         raise TypeError(f'exchange \'{exchange}\' is not a valid input')
     if qteasy.QT_TRADE_CALENDAR is not None:
-        try:
-            exchange_trade_cal = qteasy.QT_TRADE_CALENDAR.loc[exchange]
-        except KeyError as e:
-            raise KeyError(f'Trade Calender for exchange: {e} was not properly downloaded, please refill data')
-        return exchange_trade_cal[exchange_trade_cal.is_open == 1].index.max()
+        open_days = _get_exchange_open_days(exchange)
+        return open_days[-1] if len(open_days) > 0 else pd.NaT
     else:
         raise RuntimeError('Trade Calendar is not available, please download basic data into DataSource, Use:\n'
                            'qteasy.refill_data_source(tables="basics")\n'
@@ -1013,7 +1144,7 @@ def prev_market_trade_day(date, exchange='SSE'):
         e.extra_info = f'{date} is not a valid date time format, cannot be converted to timestamp'
         raise e
     if qteasy.QT_TRADE_CALENDAR is not None:
-        exchange_trade_cal = qteasy.QT_TRADE_CALENDAR.loc[exchange]
+        exchange_trade_cal = _get_exchange_trade_calendar(exchange)
         pretrade_date = exchange_trade_cal.loc[_date].pretrade_date
         return pd.to_datetime(pretrade_date)
     else:
@@ -1059,13 +1190,12 @@ def nearest_market_trade_day(date, exchange='SSE'):
     last_known_trade_day = last_known_market_trade_day(exchange)
     if _date < pd.to_datetime('19910101') or _date > last_known_trade_day:
         return None
-    if is_market_trade_day(_date, exchange):
-        return _date
-    else:
-        prev = _date - pd.Timedelta(1, 'd')
-        while not is_market_trade_day(prev):
-            prev = prev - pd.Timedelta(1, 'd')
-        return prev
+    # 在按时间排序的开市日中二分查找不晚于date的最后一个开市日
+    open_days = _get_exchange_open_days(exchange)
+    pos = open_days.searchsorted(_date, side='right')
+    if pos == 0:
+        raise ValueError(f'The date {_date} is out of trade calendar range, please refill data')
+    return open_days[pos - 1]
 
 
 @lru_cache(maxsize=16)
@@ -1113,13 +1243,12 @@ def next_market_trade_day(date, exchange='SSE', nearest_only=True):
     last_known_trade_day = last_known_market_trade_day(exchange)
     if _date < pd.to_datetime('19910101') or _date > last_known_trade_day:
         return None
-    if is_market_trade_day(_date, exchange) and nearest_only:
-        return _date
-    else:
-        next_date = _date + pd.Timedelta(1, 'd')
-        while not is_market_trade_day(next_date):
-            next_date = next_date + pd.Timedelta(1, 'd')
-        return next_date
+    # 在按时间排序的开市日中二分查找不早于date(nearest_only)或晚于date的第一个开市日
+    open_days = _get_exchange_open_days(exchange)
+    pos = open_days.searchsorted(_date, side='left' if nearest_only else 'right')
+    if pos == len(open_days):
+        raise ValueError(f'The date {_date} is out of trade calendar range, please refill data')
+    return open_days[pos]
 
 
 def weekday_name(weekday: int):
@@ -748,10 +748,12 @@ def _get_mpf_data(stock, asset_type=None, adj='none', freq='d', data_source=None
         is_out_fund = True
     # 虽然比较罕见，但是存在这样的情况，当某日的交易量为0时，当天数据中open/high/low价格均为NaN，
     # 此时应该将open/high/low三者的价格设置为与close一致，否则无法显示K线图
-    for col in ['open', 'high', 'low']:
-        col_data = data[col]
-        if np.isnan(col_data.values).any():
-            col_data.loc[pd.isna(col_data)] = data.close
+    price_cols = ['open', 'high', 'low']
+    price_values = data[price_cols].to_numpy(dtype='float')
+    nan_prices = np.isnan(price_values)
+    if nan_prices.any():
+        close_values = data['close'].to_numpy(dtype='float')[:, np.newaxis]
+        data[price_cols] = np.where(nan_prices, close_values, price_values)
 
     # 返回股票的名称和全称
     share_name = stock + ' - ' + name + ' [' + name_of[asset_type] + '] '
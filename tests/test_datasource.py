@@ -650,6 +650,75 @@ class TestDataSource(unittest.TestCase):
                     self.assertEqual(target_values[i, j], loaded_values[i, j])
             self.assertEqual(list(df_res.columns), list(loaded_df.columns))
 
+    def test_convert_csv_to_hdf(self):
+        """ test converting csv data file to hdf file in chunks"""
+        df = pd.DataFrame({
+            'ts_code':    ['000001.SZ', '000002.SZ'] * 3,
+            'trade_date': ['20211112', '20211112', '20211113', '20211113', '20211114', '20211114'],
+            'open':       np.arange(6.) + 1,
+            'high':       np.arange(6.) + 2,
+            'low':        np.arange(6.),
+            'close':      np.arange(6.) + 1.5,
+            'pre_close':  1.,
+            'change':     0.1,
+            'pct_chg':    0.01,
+            'vol':        np.arange(6.) * 100,
+            'amount':     np.arange(6.) * 1000,
+        })
+        self.ds_csv.drop_table_data('stock_daily')
+        self.ds_hdf.drop_table_data('stock_daily')
+        self.ds_csv.update_table_data('stock_daily', df)
+        self.assertRaises(TypeError, self.ds_csv.convert_csv_to_hdf, 'stock_daily', 2.5)
+        self.assertRaises(ValueError, self.ds_csv.convert_csv_to_hdf, 'stock_daily', 0)
+        self.assertRaises(FileNotFoundError, self.ds_csv.convert_csv_to_hdf, 'file_that_does_not_exist')
+        self.assertRaises(RuntimeError, self.ds_db.convert_csv_to_hdf, 'stock_daily')
+
+        print(f'convert csv file to hdf file in chunks of 4 rows')
+        rows = self.ds_csv.convert_csv_to_hdf('stock_daily', chunksize=4)
+        self.assertEqual(rows, 6)
+        self.assertTrue(self.ds_hdf.file_exists('stock_daily'))
+        csv_df = self.ds_csv.read_table_data('stock_daily')
+        hdf_df = self.ds_hdf.read_table_data('stock_daily')
+        print(f'data read from converted hdf file:\n{hdf_df}')
+        self.assertTrue(csv_df.equals(hdf_df))
+        self.assertEqual(self.ds_hdf.get_file_rows('stock_daily'), 6)
+
+        self.ds_csv.drop_table_data('stock_daily')
+        self.ds_hdf.drop_table_data('stock_daily')
+
+        print(f'convert csv file with string and date columns that are empty in the first chunk')
+        df = pd.DataFrame({
+            'ts_code':     ['000001.SZ', '000002.SZ', '000003.SZ', '000004.SZ', '000005.SZ', '000006.SZ'],
+            'symbol':      ['000001', '000002', '000003', '000004', '000005', '000006'],
+            'name':        ['A', 'B', 'C', 'D', 'E', 'F'],
+            'area':        [None, None, None, 'Shenzhen', 'Shenzhen', 'Shanghai'],
+            'industry':    ['bank', 'real estate', None, None, None, 'a much longer industry name'],
+            'fullname':    None,
+            'enname':      None,
+            'cnspell':     None,
+            'market':      'main',
+            'exchange':    'SZSE',
+            'curr_type':   'CNY',
+            'list_status': 'L',
+            'list_date':   ['19910403', '19910129', '19910114', '19901210', '19901210', '19920512'],
+            'delist_date': [None, None, None, '20230101', '20230102', None],
+            'is_hs':       'S',
+        })
+        self.ds_csv.drop_table_data('stock_basic')
+        self.ds_hdf.drop_table_data('stock_basic')
+        self.ds_csv.update_table_data('stock_basic', df)
+        rows = self.ds_csv.convert_csv_to_hdf('stock_basic', chunksize=3)
+        self.assertEqual(rows, 6)
+        hdf_df = self.ds_hdf.read_table_data('stock_basic')
+        print(f'data read from converted hdf file:\n{hdf_df}')
+        self.assertEqual(hdf_df.shape, (6, 14))
+        self.assertEqual(hdf_df.loc['000004.SZ', 'delist_date'], '20230101')
+        self.assertEqual(hdf_df.loc['000006.SZ', 'industry'], 'a much longer industry name')
+        self.assertTrue(pd.isna(hdf_df.loc['000001.SZ', 'delist_date']))
+
+        self.ds_csv.drop_table_data('stock_basic')
+        self.ds_hdf.drop_table_data('stock_basic')
+
     def test_write_and_read_database(self):
         """ test DataSource method read_database and write_database"""
         print(f'write and read a MultiIndex dataframe to database')
@@ -826,6 +826,34 @@ class TestHistoryPanel(unittest.TestCase):
         self.assertEqual(hp4.shares, ['a', 'b', 'c', 'd'])
         self.assertTrue(np.allclose(hp4.values, values2, equal_nan=True))
 
+        print('test stack dataframes with unsorted index')
+        df4 = pd.DataFrame({'a': [3, 1, 2], 'b': [6, 4, 5]})
+        df4.index = ['20210103', '20210101', '20210102']
+        sorted_dates = list(pd.to_datetime(['20210101', '20210102', '20210103']))
+        hp5 = stack_dataframes([df4], dataframe_as='shares', shares='000001.SZ')
+        self.assertEqual(hp5.hdates, sorted_dates)
+        self.assertTrue(np.allclose(hp5.values, np.array([[[1., 4.], [2., 5.], [3., 6.]]])))
+        hp6 = stack_dataframes({'close': df4, 'open': df4 * 2}, dataframe_as='htypes')
+        self.assertEqual(hp6.hdates, sorted_dates)
+        self.assertEqual(hp6.shares, ['a', 'b'])
+        self.assertTrue(np.allclose(hp6.values, np.array([[[1., 2.], [2., 4.], [3., 6.]],
+                                                          [[4., 8.], [5., 10.], [6., 12.]]])))
+
+        print('test stack dataframes with duplicated column names, the last column wins')
+        df5 = pd.DataFrame([[1, 2], [3, 4]], columns=['a', 'a'], index=['20210101', '20210102'])
+        df6 = pd.DataFrame([[5, 6], [7, 8]], columns=['a', 'b'], index=['20210101', '20210102'])
+        hp7 = stack_dataframes({'close': df5, 'open': df6}, dataframe_as='htypes')
+        self.assertEqual(hp7.htypes, ['close', 'open'])
+        self.assertEqual(hp7.shares, ['a', 'b'])
+        self.assertTrue(np.allclose(hp7.values, np.array([[[2., 5.], [4., 7.]],
+                                                          [[np.nan, 6.], [np.nan, 8.]]]),
+                                    equal_nan=True))
+        hp8 = stack_dataframes([df5, df6], dataframe_as='shares', shares='000001.SZ, 000002.SZ')
+        self.assertEqual(hp8.htypes, ['a', 'b'])
+        self.assertTrue(np.allclose(hp8.values, np.array([[[2., np.nan], [4., np.nan]],
+                                                          [[5., 6.], [7., 8.]]]),
+                                    equal_nan=True))
+
     def test_to_csv(self):
         """ 测试将HistoryPanel保存为csv文件"""
         # TODO: implement this test
@@ -853,6 +881,23 @@ class TestHistoryPanel(unittest.TestCase):
     def test_fill_inf(self):
         """测试填充无限值"""
 
+    def test_as_type(self):
+        """测试转换HistoryPanel的数据类型"""
+        new_values = self.hp.values.astype(float)
+        new_values[[0, 1, 3, 2], [1, 3, 0, 2], [1, 3, 2, 2]] = np.nan
+        temp_hp = qt.HistoryPanel(values=new_values, levels=self.hp.levels, rows=self.hp.rows, columns=self.hp.columns)
+        temp_hp.as_type('float32')
+        self.assertEqual(temp_hp.values.dtype, np.float32)
+        self.assertTrue(np.allclose(temp_hp.values, new_values, equal_nan=True))
+        # 填充缺失值后数据类型保持不变
+        temp_hp.fillna(2.3)
+        self.assertEqual(temp_hp.values.dtype, np.float32)
+        filled_values = new_values.copy()
+        filled_values[[0, 1, 3, 2], [1, 3, 0, 2], [1, 3, 2, 2]] = 2.3
+        self.assertTrue(np.allclose(temp_hp.values, filled_values))
+        temp_hp.as_type('float')
+        self.assertEqual(temp_hp.values.dtype, np.float64)
+
     def test_ffill(self):
         """ 测试前向填充函数"""
         # print(f'original values of history panel: \n{self.hp.values}')
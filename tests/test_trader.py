@@ -403,6 +403,21 @@ class TestTrader(unittest.TestCase):
 
         ts.info()
 
+    def test_live_data_fetch_tick(self):
+        """ test that live data is fetched once per schedule tick, not once per strategy bar """
+        ts = self.ts
+        self.assertFalse(ts._is_live_data_fetched('stock_30min', pd.Timestamp('2023-05-10 15:00:00')))
+        ts._mark_live_data_fetched('stock_30min', pd.Timestamp('2023-05-10 15:00:00'))
+        # strategies run at the same schedule tick share the fetched data
+        self.assertTrue(ts._is_live_data_fetched('stock_30min', pd.Timestamp('2023-05-10 15:00:00')))
+        self.assertTrue(ts._is_live_data_fetched('stock_30min', pd.Timestamp('2023-05-10 15:00:40')))
+        self.assertFalse(ts._is_live_data_fetched('stock_hourly', pd.Timestamp('2023-05-10 15:00:00')))
+        # runs at a later time within the same 30min bar (e.g. 15:29 before close) fetch fresh data
+        self.assertFalse(ts._is_live_data_fetched('stock_30min', pd.Timestamp('2023-05-10 15:29:00')))
+        ts._mark_live_data_fetched('stock_30min', pd.Timestamp('2023-05-10 15:29:00'))
+        self.assertTrue(ts._is_live_data_fetched('stock_30min', pd.Timestamp('2023-05-10 15:29:30')))
+        self.assertFalse(ts._is_live_data_fetched('stock_30min', pd.Timestamp('2023-05-10 15:00:00')))
+
     def test_trader_run(self):
         """Test full-fledged run with all tasks manually added"""
         ts = self.ts
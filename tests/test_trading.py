@@ -19,11 +19,14 @@ import numpy as np
 from qteasy.database import DataSource
 
 from qteasy.trading_util import _parse_pt_signals, _parse_ps_signals, _parse_vs_signals, _signal_to_order_elements
-from qteasy.trading_util import parse_trade_signal, submit_order, get_last_trade_result_summary, get_symbol_names
+from qteasy.trading_util import parse_trade_signal, submit_order, submit_orders, get_last_trade_result_summary
+from qteasy.trading_util import get_symbol_names
 from qteasy.trading_util import process_trade_result, process_trade_delivery, create_daily_task_schedule
+from qteasy.trading_util import cancel_order, cancel_orders
 
 from qteasy.trade_recording import new_account, get_account, update_account, update_account_balance
-from qteasy.trade_recording import update_position, get_account_positions, get_or_create_position
+from qteasy.trade_recording import update_position, update_positions, get_account_positions, get_or_create_position
+from qteasy.trade_recording import get_or_create_positions, record_trade_orders
 from qteasy.trade_recording import record_trade_order, update_trade_order, read_trade_order
 from qteasy.trade_recording import query_trade_orders, get_position_by_id, update_trade_result
 from qteasy.trade_recording import get_position_ids, read_trade_order_detail, save_parsed_trade_orders
@@ -303,6 +306,27 @@ class TestTradeRecording(unittest.TestCase):
         with self.assertRaises(RuntimeError):
             update_position(100, data_source=self.test_ds, qty_change=100, available_qty_change=100)
 
+        # update several positions in one batch
+        update_positions(
+                {5: {'qty_change': 500, 'available_qty_change': 200},
+                 6: {'qty_change': 600, 'available_qty_change': 600, 'cost': 10.0}},
+                data_source=self.test_ds,
+        )
+        position = get_position_by_id(5, data_source=self.test_ds)
+        self.assertEqual(position['qty'], 500)
+        self.assertEqual(position['available_qty'], 200)
+        position = get_position_by_id(6, data_source=self.test_ds)
+        self.assertEqual(position['qty'], 600)
+        self.assertEqual(position['available_qty'], 600)
+        self.assertEqual(position['cost'], 10.0)
+        update_positions({}, data_source=self.test_ds)
+        # no position is updated if any of the changes is not valid
+        with self.assertRaises(RuntimeError):
+            update_positions({5: {'qty_change': 100}, 6: {'qty_change': -700}}, data_source=self.test_ds)
+        with self.assertRaises(RuntimeError):
+            update_positions({5: {'qty_change': 100}, 100: {'qty_change': 100}}, data_source=self.test_ds)
+        self.assertEqual(get_position_by_id(5, data_source=self.test_ds)['qty'], 500)
+
     # test 2nd foundational function: get_account_availability / get_position_availability
     def test_get_account_cash_and_position_availabilities(self):
         """ test function get_account_cash_availabilities and get_account_position_availabilities """
@@ -388,6 +412,13 @@ class TestTradeRecording(unittest.TestCase):
         self.assertEqual(res[0], ['AAPL', 'FB', 'MSFT', 'AMZN', '000001'])
         self.assertTrue(np.allclose(res[1], np.array([1000, 0, -1000, -1000, 0])))
         self.assertTrue(np.allclose(res[2], np.array([500, 0, -700, -600, 0])))
+        # positions read in advance give the same result
+        res = get_account_position_availabilities(account_id=2,
+                                                  shares=['AAPL', 'FB', 'MSFT', 'AMZN', '000001'],
+                                                  data_source=self.test_ds,
+                                                  positions=get_account_positions(2, data_source=self.test_ds))
+        self.assertTrue(np.allclose(res[1], np.array([1000, 0, -1000, -1000, 0])))
+        self.assertTrue(np.allclose(res[2], np.array([500, 0, -700, -600, 0])))
         positions = get_account_position_details(account_id=2,
                                                  shares=['AAPL', 'FB', 'MSFT', 'AMZN', '000001'],
                                                  data_source=self.test_ds)
@@ -414,6 +445,22 @@ class TestTradeRecording(unittest.TestCase):
         self.assertEqual(positions.columns.to_list(), ['AAPL', 'MSFT', 'GOOG', 'AMZN'])
         self.assertTrue(np.allclose(positions.loc['qty'], np.array([1000, -1000, 1000, -1000])))
         self.assertTrue(np.allclose(positions.loc['available_qty'], np.array([500, -700, 1000, -600])))
+        positions = get_account_position_details(account_id=2, data_source=self.test_ds, orient='index')
+        self.assertEqual(positions.shape, (4, 3))
+        self.assertEqual(positions.index.to_list(), ['AAPL', 'MSFT', 'GOOG', 'AMZN'])
+        self.assertEqual(positions.columns.to_list(), ['qty', 'available_qty', 'cost'])
+        self.assertTrue(np.allclose(positions['qty'], np.array([1000, -1000, 1000, -1000])))
+        self.assertTrue(np.allclose(positions['available_qty'], np.array([500, -700, 1000, -600])))
+        with self.assertRaises(ValueError):
+            get_account_position_details(account_id=2, data_source=self.test_ds, orient='rows')
+
+        # account without any position gets zeros for all shares
+        new_account(user_name='test_user3', cash_amount=100000, data_source=self.test_ds)
+        res = get_account_position_availabilities(account_id=3, shares=['AAPL', 'GOOG'], data_source=self.test_ds)
+        self.assertEqual(len(res), 4)
+        self.assertEqual(res[0], ['AAPL', 'GOOG'])
+        for arr in res[1:]:
+            self.assertTrue(np.allclose(arr, np.zeros(2)))
 
     # test foundational functions related to signal generation and submission
     def test_record_read_and_update_orders(self):
@@ -987,6 +1034,108 @@ class TestTradeRecording(unittest.TestCase):
         self.assertEqual(signal_detail['status'], 'created')
         # check position detail
 
+    def test_record_orders_in_batch(self):
+        """ test get_or_create_positions and record_trade_orders functions """
+        for table in ['sys_op_live_accounts', 'sys_op_positions', 'sys_op_trade_orders']:
+            if self.test_ds.table_data_exists(table):
+                self.test_ds.drop_table_data(table)
+        new_account('test_user1', 100000, self.test_ds)
+        get_or_create_position(1, 'AAPL', 'long', self.test_ds)  # pos_id = 1
+        get_or_create_position(1, 'MSFT', 'short', self.test_ds)  # pos_id = 2
+
+        # existing positions are found, missing positions are created in order
+        pos_ids = get_or_create_positions(
+                1,
+                ['MSFT', 'GOOG', 'AAPL', 'MSFT', 'GOOG'],
+                ['short', 'long', 'long', 'long', 'long'],
+                data_source=self.test_ds,
+        )
+        self.assertEqual(pos_ids, [2, 3, 1, 4, 3])
+        self.assertEqual(get_or_create_positions(1, [], [], data_source=self.test_ds), [])
+        with self.assertRaises(ValueError):
+            get_or_create_positions(1, ['AAPL', 'MSFT'], ['long'], data_source=self.test_ds)
+        with self.assertRaises(ValueError):
+            get_or_create_positions(1, ['AAPL'], ['wrong'], data_source=self.test_ds)
+        # no position is created if any of the new positions is not valid
+        with self.assertRaises(ValueError):
+            get_or_create_positions(1, ['TSLA', 'NVDA'], ['long', 'wrong'], data_source=self.test_ds)
+        self.assertEqual(get_position_ids(1, symbol='TSLA', data_source=self.test_ds), [])
+
+        orders = [
+            {
+                'pos_id':         pos_id,
+                'direction':      'buy',
+                'order_type':     'market',
+                'qty':            qty,
+                'price':          10.0,
+                'submitted_time': None,
+                'status':         'created',
+            } for pos_id, qty in zip([1, 2, 3], [100, 200, 300])
+        ]
+        order_ids = record_trade_orders(orders, data_source=self.test_ds)
+        self.assertEqual(order_ids, [1, 2, 3])
+        order_ids = record_trade_orders(orders[:2], data_source=self.test_ds)
+        self.assertEqual(order_ids, [4, 5])
+        self.assertEqual(record_trade_orders([], data_source=self.test_ds), [])
+        for order_id, pos_id, qty in zip([1, 2, 3, 4, 5], [1, 2, 3, 1, 2], [100, 200, 300, 100, 200]):
+            order = read_trade_order(order_id, data_source=self.test_ds)
+            self.assertEqual(order['pos_id'], pos_id)
+            self.assertEqual(order['qty'], qty)
+            self.assertEqual(order['status'], 'created')
+        # no order is written if any of the orders is not valid
+        orders[1]['qty'] = -100
+        with self.assertRaises(RuntimeError):
+            record_trade_orders(orders, data_source=self.test_ds)
+        self.assertIsNone(read_trade_order(6, data_source=self.test_ds))
+
+    def test_submit_orders_in_batch(self):
+        """ test submit_orders function """
+        for table in ['sys_op_live_accounts', 'sys_op_positions', 'sys_op_trade_orders']:
+            if self.test_ds.table_data_exists(table):
+                self.test_ds.drop_table_data(table)
+        new_account('test_user1', 100000, self.test_ds)
+        pos_ids = get_or_create_positions(1, ['AAPL', 'MSFT', 'GOOG'], ['long'] * 3, data_source=self.test_ds)
+        orders = [
+            {
+                'pos_id':         pos_id,
+                'direction':      'buy',
+                'order_type':     'market',
+                'qty':            qty,
+                'price':          10.0,
+                'submitted_time': None,
+                'status':         'created',
+            } for pos_id, qty in zip(pos_ids, [100, 200, 300])
+        ]
+        order_ids = record_trade_orders(orders, data_source=self.test_ds)
+        self.assertEqual(order_ids, [1, 2, 3])
+        self.assertEqual(submit_order(2, data_source=self.test_ds), 2)
+
+        # missing order ids are reported and no order is submitted
+        with self.assertRaises(RuntimeError) as cm:
+            submit_orders([3, 98, 1, 99], data_source=self.test_ds)
+        self.assertIn('[98, 99]', str(cm.exception))
+        self.assertEqual(read_trade_order(3, data_source=self.test_ds)['status'], 'created')
+        with self.assertRaises(RuntimeError):
+            submit_orders([99], data_source=self.test_ds)
+
+        # orders already submitted are not submitted again, others are submitted in one batch
+        self.assertEqual(submit_orders([3, 2, 1], data_source=self.test_ds), [3, None, 1])
+        self.assertEqual(submit_orders([1, 2], data_source=self.test_ds), [None, None])
+        self.assertEqual(submit_orders([], data_source=self.test_ds), [])
+        for order_id, qty in zip(order_ids, [100, 200, 300]):
+            order = read_trade_order(order_id, data_source=self.test_ds)
+            self.assertEqual(order['status'], 'submitted')
+            self.assertEqual(order['qty'], qty)
+            self.assertIsNotNone(order['submitted_time'])
+
+        # orders of short positions can not be submitted
+        pos_id = get_or_create_position(1, 'AAPL', 'short', self.test_ds)
+        orders[0]['pos_id'] = pos_id
+        order_ids = record_trade_orders(orders, data_source=self.test_ds)
+        with self.assertRaises(NotImplementedError):
+            submit_orders(order_ids, data_source=self.test_ds)
+        self.assertEqual(read_trade_order(order_ids[1], data_source=self.test_ds)['status'], 'created')
+
     def test_submit_orders(self):
         """ test submit_order function """
         # remove all data in test datasource
@@ -2120,12 +2269,82 @@ class TestTradingUtilFuncs(unittest.TestCase):
         self.assertEqual(summary[0], ['AAPL', 'GOOG', 'MSFT', 'FB'])
         self.assertEqual(list(summary[1]), [0, -100, 100, 0])
         self.assertEqual(list(summary[2]), [0, 90, 81, 0])
+        # positions read in advance give the same summary
+        positions = get_account_positions(1, data_source=self.test_ds)
+        summary = get_last_trade_result_summary(1, shares=['AAPL', 'GOOG', 'MSFT', 'FB'], data_source=self.test_ds,
+                                                positions=positions)
+        self.assertEqual(list(summary[1]), [0, -100, 100, 0])
+        self.assertEqual(list(summary[2]), [0, 90, 81, 0])
 
     def test_cancel_orders(self):
-        """ test cancel_orders function """
-        # TODO: implement this function to test if partial-filled orders can be partially cancelled
-        #  and unfilled orders can be fully cancelled
-        pass
+        """ test cancel_order and cancel_orders functions, partial-filled orders are partially cancelled
+        and unfilled orders are fully cancelled """
+        for table in ['sys_op_live_accounts', 'sys_op_positions', 'sys_op_trade_orders', 'sys_op_trade_results']:
+            if self.test_ds.table_data_exists(table):
+                self.test_ds.drop_table_data(table)
+        delivery_config = {
+            'cash_delivery_period': 0,
+            'stock_delivery_period': 0,
+        }
+        new_account('test_user1', 100000, self.test_ds)
+        order_ids = save_parsed_trade_orders(
+                account_id=1,
+                symbols=['GOOG', 'AAPL', 'MSFT', 'AMZN'],
+                positions=['long', 'long', 'long', 'long'],
+                directions=['buy', 'buy', 'buy', 'buy'],
+                quantities=[100, 200, 300, 400],
+                prices=[60.0, 70.0, 80.0, 90.0],
+                data_source=self.test_ds,
+        )
+        self.assertEqual(order_ids, [1, 2, 3, 4])
+        self.assertEqual(submit_orders(order_ids, data_source=self.test_ds), [1, 2, 3, 4])
+        # order 2 and 4 are partially filled
+        for order_id, filled_qty in zip([2, 4], [50, 100]):
+            raw_trade_result = {
+                'order_id':        order_id,
+                'filled_qty':      filled_qty,
+                'price':           70.0,
+                'transaction_fee': 5.0,
+                'canceled_qty':    0.0,
+            }
+            process_trade_result(raw_trade_result, data_source=self.test_ds, config=delivery_config)
+        self.assertEqual(read_trade_order(2, data_source=self.test_ds)['status'], 'partial-filled')
+        # deliver the filled results first, as canceling orders processes delivery as well
+        process_trade_delivery(1, data_source=self.test_ds, config=delivery_config)
+        cash_before_cancel = get_account_cash_availabilities(1, data_source=self.test_ds)
+        positions_before_cancel = get_account_positions(1, data_source=self.test_ds)
+
+        # cancel one order and several orders in batch
+        cancel_order(1, data_source=self.test_ds, config=delivery_config)
+        result_ids = cancel_orders([2, 3, 4], data_source=self.test_ds, config=delivery_config)
+        self.assertEqual(len(result_ids), 3)
+        self.assertEqual(cancel_orders([], data_source=self.test_ds), [])
+        for order_id, canceled_qty in zip([1, 2, 3, 4], [100, 150, 300, 300]):
+            self.assertEqual(read_trade_order(order_id, data_source=self.test_ds)['status'], 'canceled')
+            results = read_trade_results_by_order_id(order_id, data_source=self.test_ds)
+            self.assertEqual(results['canceled_qty'].sum(), canceled_qty)
+        # canceling orders does not change cash or positions
+        self.assertEqual(get_account_cash_availabilities(1, data_source=self.test_ds), cash_before_cancel)
+        positions = get_account_positions(1, data_source=self.test_ds).loc[positions_before_cancel.index]
+        self.assertTrue(np.allclose(positions['qty'], positions_before_cancel['qty']))
+        self.assertTrue(np.allclose(positions['available_qty'], positions_before_cancel['available_qty']))
+
+        # canceled orders can not be canceled again, no order is canceled if any of them can not be canceled
+        order_ids = save_parsed_trade_orders(
+                account_id=1,
+                symbols=['GOOG'],
+                positions=['long'],
+                directions=['buy'],
+                quantities=[100],
+                prices=[60.0],
+                data_source=self.test_ds,
+        )
+        submit_orders(order_ids, data_source=self.test_ds)
+        with self.assertRaises(RuntimeError):
+            cancel_order(1, data_source=self.test_ds, config=delivery_config)
+        with self.assertRaises(RuntimeError):
+            cancel_orders(order_ids + [1], data_source=self.test_ds, config=delivery_config)
+        self.assertEqual(read_trade_order(order_ids[0], data_source=self.test_ds)['status'], 'submitted')
 
     # test top level functions related to signal generation and submission
     def test_parse_signal(self):
@@ -17,6 +17,7 @@ import logging
 
 from qteasy.utilfuncs import list_to_str_format, regulate_date_format, sec_to_duration, str_to_list
 from qteasy.utilfuncs import maybe_trade_day, is_market_trade_day, prev_trade_day, next_trade_day
+from qteasy.utilfuncs import market_trade_day_mask
 from qteasy.utilfuncs import next_market_trade_day, unify, list_or_slice, labels_to_dict, retry
 from qteasy.utilfuncs import weekday_name, nearest_market_trade_day, is_number_like, list_truncate, input_to_list
 from qteasy.utilfuncs import match_ts_code, _lev_ratio, _partial_lev_ratio, _wildcard_match, rolling_window
@@ -172,6 +173,13 @@ class TestUtilityFuncs(unittest.TestCase):
         self.assertRaises(ValueError, is_market_trade_day, date_too_early)
         self.assertRaises(ValueError, is_market_trade_day, date_too_late)
 
+        dates = [date_trade, date_holiday, date_weekend, date_seems_trade_day, date_christmas]
+        self.assertEqual(market_trade_day_mask(dates).tolist(),
+                         [is_market_trade_day(date) for date in dates])
+        self.assertEqual(market_trade_day_mask(dates, exchange='XHKG').tolist(),
+                         [is_market_trade_day(date, exchange='XHKG') for date in dates])
+        self.assertRaises(ValueError, market_trade_day_mask, [date_trade, date_too_early])
+
         date_trade = pd.to_datetime('20210401')
         date_holiday = pd.to_datetime('20210102')
         date_weekend = pd.to_datetime('20210424')
@@ -180,6 +188,17 @@ class TestUtilityFuncs(unittest.TestCase):
         self.assertFalse(maybe_trade_day(date_holiday))
         self.assertFalse(maybe_trade_day(date_weekend))
 
+        # market_trade_day_mask() falls back to maybe_trade_day() when trade calendar is not available
+        import qteasy
+        trade_calendar = qteasy.QT_TRADE_CALENDAR
+        qteasy.QT_TRADE_CALENDAR = None
+        try:
+            dates = pd.date_range('20201225', '20211010')
+            self.assertEqual(market_trade_day_mask(dates).tolist(),
+                             [maybe_trade_day(date) for date in dates])
+        finally:
+            qteasy.QT_TRADE_CALENDAR = trade_calendar
+
     def test_weekday_name(self):
         """ test util func weekday_name()"""
         self.assertEqual(weekday_name(0), 'Monday')
@@ -299,6 +318,11 @@ class TestUtilityFuncs(unittest.TestCase):
                          pd.to_datetime(date_christmas))
         self.assertEqual(pd.to_datetime(nearest_market_trade_day(date_christmas, 'XHKG')),
                          pd.to_datetime(prev_christmas_xhkg))
+        # 圣诞节后的周六，港交所的前一个交易日需要跳过圣诞节，而上交所不需要
+        self.assertEqual(pd.to_datetime(nearest_market_trade_day('20201226', 'SSE')),
+                         pd.to_datetime(date_christmas))
+        self.assertEqual(pd.to_datetime(nearest_market_trade_day('20201226', 'XHKG')),
+                         pd.to_datetime(prev_christmas_xhkg))
 
     def test_next_market_trade_day(self):
         """ test the function next_market_trade_day()
@@ -333,6 +357,11 @@ class TestUtilityFuncs(unittest.TestCase):
                          pd.to_datetime(date_christmas))
         self.assertEqual(pd.to_datetime(next_market_trade_day(date_christmas, 'XHKG')),
                          pd.to_datetime(next_christmas_xhkg))
+        # 圣诞节前一天，港交所的下一个交易日需要跳过圣诞节，而上交所不需要
+        self.assertEqual(pd.to_datetime(next_market_trade_day('20201224', 'SSE', nearest_only=False)),
+                         pd.to_datetime(date_christmas))
+        self.assertEqual(pd.to_datetime(next_market_trade_day('20201224', 'XHKG', nearest_only=False)),
+                         pd.to_datetime(next_christmas_xhkg))
 
     def test_is_number_like(self):
         """test the function: is_number_like()"""